@@ -15,12 +15,14 @@
 
 # Some parts are taken from msnweathercomponent plugin for compatibility reasons.
 
-from os.path import join, exists, isfile
+from operator import methodcaller
+from os.path import join
 from traceback import print_exc
 
 from Components.Converter.Converter import Converter
 from Components.config import config
 from Components.Element import cached
+from Plugins.Extensions.OAWeather import DebugLog
 
 
 class OAWeather(Converter, object):
@@ -38,11 +40,77 @@ class OAWeather(Converter, object):
 		"day4": DAY4,
 		"day5": DAY5
 	}
+	INDEXMODES = {  # modes depending on the day argument: mode -> factory(index) returning a callable(source)
+		"pressure_average": lambda index: methodcaller("getAveragePressure", index),
+		"temperature_high": lambda index: methodcaller("getMaxTemp", index),
+		"temperature_low": lambda index: methodcaller("getMinTemp", index),
+		"temperature_high_low": lambda index: methodcaller("getMaxMinTemp", index),
+		"temperature_text": lambda index: methodcaller("getKeyforDay", "text", index, ""),
+		"feelslike_max": lambda index: methodcaller("getMaxFeelsLike", index),
+		"feelslike_min": lambda index: methodcaller("getMinFeelsLike", index),
+		"winddisplay_max": lambda index: lambda source: "%s %s" % (source.getMaxWindSpeed(index), source.getDomWindDirName(index)),
+		"windspeed_max": lambda index: methodcaller("getMaxWindSpeed", index),
+		"winddir_dominant": lambda index: methodcaller("getDomWindDir", index),
+		"winddirsign_dominant": lambda index: methodcaller("getDomWindDirSign", index),
+		"winddirarrow_dominant": lambda index: methodcaller("getDomWindDirArrow", index),
+		"winddirname_dominant": lambda index: methodcaller("getDomWindDirName", index),
+		"winddirshort_dominant": lambda index: methodcaller("getDomWindDirShort", index),
+		"windgusts_max": lambda index: methodcaller("getMaxWindGusts", index),
+		"uvindex_max": lambda index: methodcaller("getMaxUvIndex", index),
+		"visibility_max": lambda index: methodcaller("getMaxVisibility", index),
+		"weathericon": lambda index: methodcaller("getYahooCode", index),
+		"yahoocode": lambda index: methodcaller("getYahooCode", index),
+		"meteocode": lambda index: methodcaller("getMeteoCode", index),
+		"weekday": lambda index: methodcaller("getKeyforDay", "day", index),
+		"weekshortday": lambda index: methodcaller("getKeyforDay", "shortDay", index),
+		"date": lambda index: methodcaller("getDate", index),
+		"precipitation": lambda index: methodcaller("getPrecipitation", index),
+		"precipitationfull": lambda index: methodcaller("getPrecipitation", index, True),
+		"umbrellaindex": lambda index: methodcaller("getUmbrellaIndex", index)
+	}
+	CURRENTMODES = {  # modes without day argument: mode -> callable(source)
+		"weathersource": methodcaller("getWeatherSource"),
+		"city": methodcaller("getCity"),
+		"cityarea": methodcaller("getCityArea"),
+		"citycountry": methodcaller("getCityCountry"),
+		"citycountryarea": methodcaller("CityCountryArea"),
+		"cityareacountry": methodcaller("getCityAreaCountry"),
+		"observationPoint": methodcaller("getCityAreaCountry"),
+		"observationtime": methodcaller("getObservationTime"),
+		"sunrise": methodcaller("getSunrise"),
+		"sunset": methodcaller("getSunset"),
+		"moonrise": methodcaller("getMoonrise"),
+		"moonset": methodcaller("getMoonset"),
+		"isnight": methodcaller("getIsNight"),
+		"pressure_current": methodcaller("getPressure"),
+		"temperature_current": methodcaller("getTemperature"),
+		"feelslike": methodcaller("getFeeltemp"),
+		"feelslikefull": methodcaller("getFeeltemp", True),
+		"humidity": methodcaller("getHumidity"),
+		"humidityfull": methodcaller("getHumidity", True),
+		"raintext": methodcaller("getRainText"),
+		"winddisplay": lambda source: "%s %s" % (source.getWindSpeed(), source.getWindDirName()),
+		"windspeed": methodcaller("getWindSpeed"),
+		"winddir": methodcaller("getWindDir"),
+		"winddirsign": methodcaller("getWindDirSign"),
+		"winddirarrow": methodcaller("getWindDirArrow"),
+		"winddirname": methodcaller("getWindDirName"),
+		"winddirshort": methodcaller("getWindDirShort"),
+		"windgusts": methodcaller("getWindGusts"),
+		"uvindex": methodcaller("getUVindex"),
+		"visibility": methodcaller("getVisibility"),
+		"moonillumination": methodcaller("getMoonIllumination"),
+		"moondistance": methodcaller("getMoonDistance"),
+		"moonphaseicon": methodcaller("getMoonPixFilename")
+	}
+
+	ASTROMODES = ("sunrise", "sunset", "moonrise", "moonset", "moonillumination", "moondistance", "moonphaseicon")
+	INFOMODES = ("weathersource", "city", "cityarea", "citycountry", "citycountryarea", "cityareacountry", "observationPoint", "logo")  # only changed with the location or service
 
 	def __init__(self, type: str):
-		self.enabledebug = config.plugins.OAWeather.debug.value
+		self.debug = DebugLog("Converter", config.plugins.OAWeather.debug.value)
 		Converter.__init__(self, type)
-		self.debug("__init__ type:%s" % type)
+		self.debug("__init__ type:%s", type)
 		self.index = None
 		self.mode = None
 		self.path = None
@@ -56,147 +124,55 @@ class OAWeather(Converter, object):
 				self.path = value[2].strip()
 				if len(value) > 3:
 					self.extension = value[3].strip()
-		self.debug("__init__ DONE self.mode:%s self.index:%s self.path:%s" % (self.mode, self.index, self.path))
+		self.textFunc = self.getTextFunc()  # resolve the mode only once, getText just calls it
+		self.group = self.getGroup()
+		self.debug("__init__ DONE self.mode:%s self.index:%s self.path:%s", self.mode, self.index, self.path)
 		if config.plugins.OAWeather.debug.value:
 			self.getText = self.getTextDebug
 
 	def getIndex(self, key: str):
-		self.debug("getIndex key:%s" % (key))
+		self.debug("getIndex key:%s", key)
 		return self.DAYS.get(key, None)
 
+	def getGroup(self):  # the group of source changes this converter depends on, None = all
+		if self.mode in self.ASTROMODES:
+			return "astro"
+		if self.mode in self.INFOMODES:
+			return "info"
+		if self.index is not None:
+			return "day%d" % self.index if self.index else "current"
+		return "current" if self.mode in self.CURRENTMODES else None
+
+	def changed(self, what):
+		if what[0] == self.CHANGED_SPECIFIC and self.group and self.group not in what[1]:
+			return  # the source data of this converter is unchanged, keep the cached values
+		Converter.changed(self, what)
+
+	def getTextFunc(self):
+		if not self.mode:
+			return None
+		if self.index is not None:
+			factory = self.INDEXMODES.get(self.mode)
+			return factory(self.index) if factory else methodcaller("getKeyforDay", self.mode, self.index, "")
+		return self.CURRENTMODES.get(self.mode, methodcaller("getVal", self.mode))
+
 	@cached
 	def getTextDebug(self):
-		self.debug("getText mode:%s index:%s" % (self.mode, self.index))
+		self.debug("getText mode:%s index:%s", self.mode, self.index)
 		text = self.getText()
-		self.debug("getText mode:%s index:%s value:%s" % (self.mode, self.index, text))
+		self.debug("getText mode:%s index:%s value:%s", self.mode, self.index, text)
 		return text
 
 	@cached
 	def getText(self):
-		if self.mode:
+		if self.textFunc:
 			try:
-				if self.index is not None:
-					if self.mode == "pressure_average":
-						return self.source.getAveragePressure(self.index)
-					elif self.mode == "temperature_high":
-						return self.source.getMaxTemp(self.index)
-					elif self.mode == "temperature_low":
-						return self.source.getMinTemp(self.index)
-					elif self.mode == "temperature_high_low":
-						return self.source.getMaxMinTemp(self.index)
-					elif self.mode == "temperature_text":
-						return self.source.getKeyforDay("text", self.index, "")
-					elif self.mode == "feelslike_max":
-						return "%s %s" % (self.source.getMaxFeelsLike(self.index))
-					elif self.mode == "feelslike_min":
-						return "%s %s" % (self.source.getMinFeelsLike(self.index))
-					elif self.mode == "winddisplay_max":
-						return "%s %s" % (self.source.getMaxWindSpeed(self.index), self.source.getDomWindDirName(self.index))
-					elif self.mode == "windspeed_max":
-						return self.source.getMaxWindSpeed(self.index)
-					elif self.mode == "winddir_dominant":
-						return self.source.getDomWindDir(self.index)
-					elif self.mode == "winddirsign_dominant":
-						return self.source.getDomWindDirSign(self.index)
-					elif self.mode == "winddirarrow_dominant":
-						return self.source.getDomWindDirArrow(self.index)
-					elif self.mode == "winddirname_dominant":
-						return self.source.getDomWindDirName(self.index)
-					elif self.mode == "winddirshort_dominant":
-						return self.source.getDomWindDirShort(self.index)
-					elif self.mode == "windgusts_max":
-						return self.source.getMaxWindGusts(self.index)
-					elif self.mode == "uvindex_max":
-						return self.source.getMaxUvIndex(self.index)
-					elif self.mode == "visibility_max":
-						return self.source.getMaxVisibility(self.index)
-					elif self.mode in ("weathericon", "yahoocode"):
-						return self.source.getYahooCode(self.index)
-					elif self.mode == "meteocode":
-						return self.source.getMeteoCode(self.index)
-					elif self.mode == "weekday":
-						return self.source.getKeyforDay("day", self.index)
-					elif self.mode == "weekshortday":
-						return self.source.getKeyforDay("shortDay", self.index)
-					elif self.mode == "date":
-						return self.source.getDate(self.index)
-					elif self.mode == "precipitation":
-						return self.source.getPrecipitation(self.index)
-					elif self.mode == "precipitationfull":
-						return self.source.getPrecipitation(self.index, True)
-					elif self.mode == "umbrellaindex":
-						return self.source.getUmbrellaIndex(self.index)
-					else:
-						return self.source.getKeyforDay(self.mode, self.index, "")
-				if self.mode == "weathersource":
-					return self.source.getWeatherSource()
-				elif self.mode == "city":
-					return self.source.getCity()
-				elif self.mode == "cityarea":
-					return self.source.getCityArea()
-				elif self.mode == "citycountry":
-					return self.source.CityCountry()
-				elif self.mode == "citycountryarea":
-					return self.source.CityCountryArea()
-				elif self.mode in ["cityareacountry", "observationPoint"]:
-					return self.source.getCityAreaCountry()
-				elif self.mode == "observationtime":
-					return self.source.getObservationTime()
-				elif self.mode == "sunrise":
-					return self.source.getSunrise()
-				elif self.mode == "sunset":
-					return self.source.getSunset()
-				elif self.mode == "moonrise":
-					return self.source.getMoonrise()
-				elif self.mode == "moonset":
-					return self.source.getMoonset()
-				elif self.mode == "isnight":
-					return self.source.getIsNight()
-				elif self.mode == "pressure_current":
-					return self.source.getPressure()
-				elif self.mode == "temperature_current":
-					return self.source.getTemperature()
-				elif self.mode == "feelslike":
-					return self.source.getFeeltemp()
-				elif self.mode == "feelslikefull":
-					return self.source.getFeeltemp(True)
-				elif self.mode == "humidity":
-					return self.source.getHumidity()
-				elif self.mode == "humidityfull":
-					return self.source.getHumidity(True)
-				elif self.mode == "raintext":
-					return self.source.getRainText()
-				elif self.mode == "winddisplay":
-					return "%s %s" % (self.source.getWindSpeed(), self.source.getWindDirName())
-				elif self.mode == "windspeed":
-					return self.source.getWindSpeed()
-				elif self.mode == "winddir":
-					return self.source.getWindDir()
-				elif self.mode == "winddirsign":
-					return self.source.getWindDirsign()
-				elif self.mode == "winddirarrow":
-					return self.source.getWindDirArrow()
-				elif self.mode == "winddirname":
-					return self.source.getWindDirName()
-				elif self.mode == "winddirshort":
-					return self.source.getWindDirShort()
-				elif self.mode == "windgusts":
-					return self.source.getWindGusts()
-				elif self.mode == "uvindex":
-					return self.source.getUVindex()
-				elif self.mode == "visibility":
-					return self.source.getVisibility()
-				elif self.mode == "moonillumination":
-					return self.source.getMoonIllumination()
-				elif self.mode == "moondistance":
-					return self.source.getMoonDistance()
-				elif self.mode == "moonphaseicon":
-					return self.source.getMoonPixFilename()
-				else:
-					return self.source.getVal(self.mode)
+				return self.textFunc(self.source)
 			except Exception as err:
 				print("[OAWeather] Converter Error: %s" % str(err))
 				print_exc()
+				if isinstance(getattr(self.source, "debug", None), DebugLog):
+					self.source.debug.dump()  # show the lookups that led to the error
 		return ""
 
 	text = property(getText)
@@ -220,33 +196,21 @@ class OAWeather(Converter, object):
 	def getIconFilename(self):
 		if self.mode == "logo":
 			try:
-				path = join(self.source.pluginpath, "Images", "%s_weather_logo.png" % self.source.logo)
-				if isfile(path):
-					return path
+				return self.source.iconindex.getIconFile(join(self.source.pluginpath, "Images"), "%s_weather_logo.png" % self.source.logo)
 			except Exception:
 				return ""
 		if self.mode == "moonphaseicon":
 			try:
-				path = join(self.source.pluginpath, "Images/moonphases/", self.source.getMoonPixFilename())
-				if isfile(path):
-					return path
+				return self.source.iconindex.getIconFile(join(self.source.pluginpath, "Images", "moonphases"), self.source.getMoonPixFilename())
 			except Exception:
 				return ""
 		if self.index in (self.CURRENT, self.DAY1, self.DAY2, self.DAY3, self.DAY4, self.DAY5):
-			path = self.source.iconpath
-			if self.path:
-				path = self.path
-			if path and exists(path):
-				code = self.source.getYahooCode(self.index)
-				if code:
-					path = join(path, "%s.%s" % (code, self.extension))
-					if isfile(path):
-						return path
-			self.debug("getIconFilename not found mode:%s index:%s self.path:%s path:%s" % (self.mode, self.index, self.path, path))
+			path = self.path or self.source.iconpath
+			code = self.source.getYahooCode(self.index)
+			iconfile = self.source.iconindex.getIconFile(path, "%s.%s" % (code, self.extension)) if path and code else ""
+			if iconfile:
+				return iconfile
+			self.debug("getIconFilename not found mode:%s index:%s self.path:%s path:%s", self.mode, self.index, self.path, path)
 		return ""
 
 	iconfilename = property(getIconFilename)
-
-	def debug(self, text: str):
-		if self.enabledebug:
-			print("[OAWeather] Converter DEBUG %s" % text)
@@ -15,6 +15,7 @@
 
 from Components.Renderer.Renderer import Renderer
 from enigma import ePixmap, BT_SCALE, BT_KEEP_ASPECT_RATIO, BT_HALIGN_CENTER, BT_VALIGN_CENTER
+from Plugins.Extensions.OAWeather.plugin import pixmappool
 
 
 class OAWeatherPixmap(Renderer):
@@ -38,5 +39,9 @@ class OAWeatherPixmap(Renderer):
 			else:
 				self.instance.show()
 				if self.iconFileName != pngname:
-					self.instance.setPixmapFromFile(pngname)
+					pixmap = pixmappool.getPixmap(pngname)  # decoded images are shared between all widgets
+					if pixmap:
+						self.instance.setPixmap(pixmap)
+					else:
+						self.instance.setPixmapFromFile(pngname)
 					self.iconFileName = pngname
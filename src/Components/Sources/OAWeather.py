@@ -14,10 +14,43 @@
 # along with OAWeather.  If not, see <http://www.gnu.org/licenses/>.
 
 from datetime import datetime, timedelta
-from math import pi, floor, cos
+from enigma import eTimer
 from Components.config import config
 from Components.Sources.Source import Source
-from Plugins.Extensions.OAWeather.plugin import weatherhandler
+from Plugins.Extensions.OAWeather import DebugLog
+from Plugins.Extensions.OAWeather.astro import MoonTable
+from Plugins.Extensions.OAWeather.plugin import iconindex, weatherhandler
+
+
+class Snapshot():  # read-only container, values are set once by the constructor
+	__slots__ = ()
+
+	def __init__(self, **values):
+		for key, value in values.items():
+			object.__setattr__(self, key, value)
+
+	def __setattr__(self, key, value):
+		raise AttributeError("%s is read-only" % self.__class__.__name__)
+
+
+class CurrentSnapshot(Snapshot):
+	__slots__ = ("weatherSource", "city", "cityArea", "cityCountry", "cityCountryArea", "cityAreaCountry", "observationTime", "sunrise", "sunset",
+				"moonrise", "moonset", "isNight", "temperature", "feeltemp", "feeltempFull", "humidity", "humidityFull", "rainText", "windSpeed",
+				"windDir", "windDirSign", "windDirName", "windDirArrow", "windDirShort", "windGusts", "uvIndex", "visibility", "pressure")
+
+
+class DaySnapshot(Snapshot):
+	__slots__ = ("date", "averagePressure", "maxTemp", "minTemp", "maxMinTemp", "maxFeelsLike", "minFeelsLike", "maxWindSpeed", "minWindSpeed",
+				"domWindDir", "domWindDirSign", "domWindDirName", "domWindDirArrow", "domWindDirShort", "maxWindGusts", "maxUvIndex", "maxVisibility",
+				"precipitation", "precipitationFull", "umbrellaIndex", "yahooCode", "meteoCode")
+
+
+class AstroSnapshot(Snapshot):
+	__slots__ = ("moonIllumination", "moonDistance", "moonPixFilename")
+
+
+class WeatherSnapshot(Snapshot):
+	__slots__ = ("current", "days")  # days[0] = current, days[1..5] = forecast days
 
 
 class OAWeather(Source):
@@ -33,10 +66,12 @@ class OAWeather(Source):
 	METEOdayswitch = {"2": "1", "3": "4", "C": "B", "I": "H", "K": "J"}
 
 	services = {"MSN": "msn", "OpenMeteo": "omw", "OpenWeather": "owm"}
+	ASTROINTERVAL = 600  # seconds between updates of the moon widgets
 
 	def __init__(self):
 		Source.__init__(self)
-		self.enabledebug = config.plugins.OAWeather.debug.value
+		enabled = config.plugins.OAWeather.debug.value
+		self.debug = DebugLog("Source", enabled, history=100 if enabled else 0)  # the history is only kept for debugging
 		weatherhandler.onUpdate.append(self.callbackUpdate)
 		self.data = weatherhandler.getData() or {}
 		self.valid = weatherhandler.getValid()
@@ -52,21 +87,163 @@ class OAWeather(Source):
 		self.logo = self.services.get(config.plugins.OAWeather.weatherservice.value, "msn")
 		self.pluginpath = None
 		self.iconpath = None
-
-	def debug(self, text: str):
-		if self.enabledebug:
-			print("[OAWeather] Source DEBUG %s" % text)
-
-	def callbackUpdate(self, data):
-		self.debug("callbackUpdate: %s" % str(data))
+		self.iconindex = iconindex
+		self.modelTimer = eTimer()
+		self.modelTimer.callback.append(self.requestModel)
+		self.snapshot = self.buildSnapshot()
+		self.moontable = MoonTable()
+		self.astro = self.buildAstro()
+		self.astroTimer = eTimer()
+		self.astroTimer.callback.append(self.astroUpdate)
+		self.astroTimer.start(self.ASTROINTERVAL * 1000, False)
+		config.plugins.OAWeather.windspeedMetricUnit.addNotifier(self.configChanged, initial_call=False)
+		config.plugins.OAWeather.nighticons.addNotifier(self.configChanged, initial_call=False)
+		config.plugins.OAWeather.trendarrows.addNotifier(self.configChanged, initial_call=False)
+
+	def callbackUpdate(self, data, sections=None):  # sections = names of the changed data sections, None = all
+		self.debug("callbackUpdate: %s %s", sections, data)
 		self.data = data or {}
-		self.logo = self.services.get(config.plugins.OAWeather.weatherservice.value, "msn")
-		self.pressunit = self.getVal("pressunit")
-		self.tempunit = self.getVal("tempunit")
-		self.windunit = self.getVal("windunit")
-		self.visibilityunit = self.getVal("visibiliyunit")
+		if sections is None or "info" in sections:  # units or location changed: everything has to be formatted again
+			self.logo = self.services.get(config.plugins.OAWeather.weatherservice.value, "msn")
+			self.pressunit = self.getVal("pressunit")
+			self.tempunit = self.getVal("tempunit")
+			self.windunit = self.getVal("windunit")
+			self.visibilityunit = self.getVal("visibiliyunit")
+			self.snapshot = self.buildSnapshot()
+		else:
+			groups = self.getChangedGroups(sections)
+			if groups:  # only the converters of these groups are updated
+				self.snapshot = self.updateSnapshot(sections)
+				self.changed((self.CHANGED_SPECIFIC, groups))
+			return
+		self.changed((self.CHANGED_ALL,))
+
+	def getChangedGroups(self, sections):  # maps data sections to the converter groups "current", "astro" and "day1" ... "day5"
+		groups = {"day%d" % (int(section[8:]) + 1) for section in sections if section.startswith("forecast")}  # forecast day 0 is shown as day1
+		if "current" in sections:
+			groups.add("current")
+			if any(self.formatIsotime(self.getAstroVal(key), "%H:%M") != getattr(self.snapshot.current, key) for key in ("sunrise", "sunset", "moonrise", "moonset")):
+				groups.add("astro")
+		return groups
+
+	def updateSnapshot(self, sections):  # rebuild only the changed parts, the others are reused
+		current = self.buildCurrent() if "current" in sections else self.snapshot.current
+		days = tuple(self.buildDay(day) if ("current" if day == 0 else "forecast%s" % (day - 1)) in sections else self.snapshot.days[day] for day in range(6))  # see getKeyforDay()
+		return WeatherSnapshot(current=current, days=days)
+
+	def configChanged(self, configElement=None):
+		self.snapshot = self.buildSnapshot()
+		self.astro = self.buildAstro()
 		self.changed((self.CHANGED_ALL,))
 
+	def buildSnapshot(self):  # format all widget strings once per update, the getters only look them up
+		return WeatherSnapshot(current=self.buildCurrent(), days=tuple(self.buildDay(day) for day in range(6)))
+
+	def buildCurrent(self):
+		windDirSign = self.getCurrentVal("windDirSign", "")
+		windDirParts = windDirSign.split(" ") if windDirSign else []
+		observationPoint = self.getCurrentVal("observationPoint")
+		components = observationPoint.split(", ")
+		cityArea = ", ".join(components[:2])
+		cityCountryArea = "%s, %s, %s" % (components[0], components[-1], components[1]) if len(components) > 2 else cityArea
+		temp, feelsLike, humidity = self.getCurrentVal("temp"), self.getCurrentVal("feelsLike"), self.getCurrentVal("humidity")
+		windDir = self.getCurrentVal("windDir")
+		return CurrentSnapshot(
+			weatherSource=self.getCurrentVal("source"),
+			city=self.getVal("name"),
+			cityArea=cityArea,
+			cityCountry=cityArea,
+			cityCountryArea=cityCountryArea,
+			cityAreaCountry=observationPoint,
+			observationTime=self.formatIsotime(self.getCurrentVal("observationTime", ""), "%H:%M"),
+			sunrise=self.formatIsotime(self.getAstroVal("sunrise"), "%H:%M"),
+			sunset=self.formatIsotime(self.getAstroVal("sunset"), "%H:%M"),
+			moonrise=self.formatIsotime(self.getAstroVal("moonrise"), "%H:%M"),
+			moonset=self.formatIsotime(self.getAstroVal("moonset"), "%H:%M"),
+			isNight=str(self.getCurrentVal("isNight", "False")) == "True",
+			temperature="%s %s" % (temp, self.tempunit),
+			feeltemp="%s %s" % (feelsLike, self.tempunit),
+			feeltempFull="%s %s %s" % (self.feelsliketext, feelsLike, self.tempunit),
+			humidity="%s %s" % (humidity, "%"),
+			humidityFull="%s %s %s" % (self.humiditytext, humidity, "%"),
+			rainText=self.getCurrentVal("raintext", ""),
+			windSpeed=self.formatWindSpeed(self.getCurrentVal("windSpeed")),
+			windDir=("%s °" % windDir) if windDir else self.na,
+			windDirSign=windDirSign,
+			windDirName=self.skydirs.get(windDirParts[1], windDirParts[1]) if len(windDirParts) > 1 else self.na,
+			windDirArrow=windDirParts[0] if windDirParts else "",
+			windDirShort=windDirParts[1] if len(windDirParts) > 1 else "",
+			windGusts=self.formatWindSpeed(self.getCurrentVal("windGusts")),
+			uvIndex=self.getCurrentVal("uvIndex", ""),
+			visibility="%s %s" % (self.getCurrentVal("visibility", self.na), self.visibilityunit),
+			pressure="%s %s" % (self.getCurrentVal("pressure", self.na), self.pressunit)
+			)
+
+	def buildDay(self, day: int):
+		domWindDirSign = self.getKeyforDay("domWindDirSign", day, "")
+		domWindDirParts = domWindDirSign.split(" ") if domWindDirSign else []
+		domWindDir = self.getKeyforDay("domWindDir", day, "")
+		minTemp, maxTemp = self.getKeyforDay("minTemp", day), self.getKeyforDay("maxTemp", day)
+		precipitation = "%s %s" % (self.getKeyforDay("precipitation", day), self.getVal("precunit"))
+		iconcode = self.getKeyforDay("yahooCode", day, "")
+		meteocode = self.getKeyforDay("meteoCode", day, "")
+		nightSwitch = day == 0 and config.plugins.OAWeather.nighticons.value and str(self.getCurrentVal("isNight", "False")) == "True"
+		return DaySnapshot(
+			date=self.formatIsotime(self.getKeyforDay("date", day, ""), "%d. %b"),
+			averagePressure="%s %s" % (self.getKeyforDay("pressure", day), self.pressunit),
+			maxTemp="%s %s" % (maxTemp, self.tempunit),
+			minTemp="%s %s" % (minTemp, self.tempunit),
+			maxMinTemp="%s / %s %s" % (minTemp, maxTemp, self.tempunit),
+			maxFeelsLike="%s %s" % (self.getKeyforDay("maxFeelsLike", day), self.tempunit),
+			minFeelsLike="%s %s" % (self.getKeyforDay("minFeelsLike", day), self.tempunit),
+			maxWindSpeed=self.formatWindSpeed(self.getKeyforDay("maxWindSpeed", day)),
+			minWindSpeed=self.formatWindSpeed(self.getKeyforDay("maxWindSpeed", day)),
+			domWindDir=("%s °" % domWindDir) if domWindDir else self.na,
+			domWindDirSign=domWindDirSign,
+			domWindDirName=self.skydirs.get(domWindDirParts[1], domWindDirParts[1]) if len(domWindDirParts) > 1 else self.na,
+			domWindDirArrow=domWindDirParts[0] if domWindDirParts else "",
+			domWindDirShort=domWindDirParts[1] if len(domWindDirParts) > 1 else "",
+			maxWindGusts=self.formatWindSpeed(self.getKeyforDay("maxWindGusts", day)),
+			maxUvIndex="%s" % self.getKeyforDay("maxUvIndex", day, ""),
+			maxVisibility="%s %s" % (self.getKeyforDay("maxVisibility", day), self.visibilityunit),
+			precipitation=precipitation,
+			precipitationFull="%s %s" % (self.precipitationtext, precipitation),
+			umbrellaIndex=self.getKeyforDay("umbrellaIndex", day, ""),
+			yahooCode=self.YAHOOnightswitch.get(iconcode, iconcode) if nightSwitch else self.YAHOOdayswitch.get(iconcode, iconcode),
+			meteoCode=self.METEOnightswitch.get(meteocode, meteocode) if nightSwitch else meteocode
+			)
+
+	def getAstroVal(self, key):  # times the service does not support are taken from the calculated values of today
+		value = self.getCurrentVal(key, "")
+		if not value:
+			model = weatherhandler.weatherModel
+			if model is None:  # not normalized yet: not during the skin rendering, the values follow in modelReady()
+				if not self.modelTimer.isActive():
+					self.modelTimer.start(0, True)
+				return ""
+			value = getattr(model.days[0], key) if model.days else ""
+		return value
+
+	def requestModel(self):  # the main loop is idle again, even creating the Weatherinfo for the icon codes can wait until now
+		weatherhandler.requestModel("source", self.modelReady)
+
+	def modelReady(self, model):
+		if model and model.days:
+			self.snapshot = WeatherSnapshot(current=self.buildCurrent(), days=self.snapshot.days)
+			self.changed((self.CHANGED_SPECIFIC, {"astro"}))
+
+	def formatIsotime(self, isotime, timeformat):
+		return datetime.fromisoformat(isotime).strftime(timeformat) if isotime else self.na
+
+	def formatWindSpeed(self, windSpeed):
+		windunit = self.windunit
+		if windunit == "km/h" and config.plugins.OAWeather.windspeedMetricUnit.value == "m/s":
+			try:
+				windSpeed, windunit = str(round(int(windSpeed) / 3.6, 1)), "m/s"
+			except ValueError:  # e.g. 'n/a'
+				pass
+		return "%s %s" % (windSpeed, windunit)
+
 	def getValid(self):
 		return self.valid
 
@@ -74,282 +251,199 @@ class OAWeather(Source):
 		return self.data.get(key, self.na) if self.data else self.na
 
 	def getCurrentVal(self, key: str, default: str = _("n/a")):
-		self.debug("getCurrentVal:%s" % key)
 		val = self.data.get("current", {}).get(key, default)
-		self.debug("current key val: %s" % val)
+		self.debug("getCurrentVal key:%s val:%s", key, val)
 		return val
 
 	def getWeatherSource(self):
-		return self.getCurrentVal("source")
+		return self.snapshot.current.weatherSource
 
 	def getCity(self):
-		return self.getVal("name")
-
-	def getCityArea(self, default: str = _("n/a")):
-		components = self.getCurrentVal("observationPoint").split(", ")
-		len_components = len(components)
-		if len_components > 1:
-			return "%s, %s" % (components[0], components[1])
-		if len_components == 1:
-			return "%s" % components[0]
-		else:
-			return default
-
-	def getCityCountry(self, default: str = _("n/a")):
-		components = self.getCurrentVal("observationPoint").split(", ")
-		len_components = len(components)
-		if len_components > 1:
-			return "%s, %s" % (components[0], components[1])
-		if len_components == 1:
-			return "%s" % components[0]
-		else:
-			return default
-
-	def CityCountryArea(self, default: str = _("n/a")):
-		components = self.getCurrentVal("observationPoint").split(", ")
-		len_components = len(components)
-		if len_components > 2:
-			return "%s, %s, %s" % (components[0], components[-1], components[1])
-		if len_components == 2:
-			return "%s, %s" % (components[0], components[-1])
-		if len_components == 1:
-			return "%s" % components[0]
-		else:
-			return default
+		return self.snapshot.current.city
+
+	def getCityArea(self):
+		return self.snapshot.current.cityArea
+
+	def getCityCountry(self):
+		return self.snapshot.current.cityCountry
+
+	def CityCountryArea(self):
+		return self.snapshot.current.cityCountryArea
 
 	def getCityAreaCountry(self):
-		return self.getCurrentVal("observationPoint")
+		return self.snapshot.current.cityAreaCountry
 
 	def getObservationTime(self):
-		val = self.getCurrentVal("observationTime", "")
-		return datetime.fromisoformat(val).strftime("%H:%M") if val else self.na
+		return self.snapshot.current.observationTime
 
 	def getSunrise(self):
-		val = self.getCurrentVal("sunrise", "")
-		return datetime.fromisoformat(val).strftime("%H:%M") if val else self.na
+		return self.snapshot.current.sunrise
 
 	def getSunset(self):
-		val = self.getCurrentVal("sunset", "")
-		return datetime.fromisoformat(val).strftime("%H:%M") if val else self.na
+		return self.snapshot.current.sunset
 
 	def getMoonrise(self):
-		val = self.getCurrentVal("moonrise", "")
-		return datetime.fromisoformat(val).strftime("%H:%M") if val else self.na
+		return self.snapshot.current.moonrise
 
 	def getMoonset(self):
-		val = self.getCurrentVal("moonset", "")
-		return datetime.fromisoformat(val).strftime("%H:%M") if val else self.na
+		return self.snapshot.current.moonset
 
 	def getDate(self, day: int):
-		val = self.getKeyforDay("date", day, "")
-		return datetime.fromisoformat(val).strftime("%d. %b") if val else self.na
+		return self.snapshot.days[day].date
 
 	def getIsNight(self):
-		return str(self.getCurrentVal("isNight", "False")) == "True"
+		return self.snapshot.current.isNight
 
 	def getTemperature(self):
-		return "%s %s" % (self.getCurrentVal("temp"), self.tempunit)
+		return self.snapshot.current.temperature
 
 	def getFeeltemp(self, full=False):
-		text = "%s " % self.feelsliketext if full else ""
-		return "%s%s %s" % (text, self.getCurrentVal("feelsLike"), self.tempunit)
+		return self.snapshot.current.feeltempFull if full else self.snapshot.current.feeltemp
 
 	def getHumidity(self, full=False):
-		text = "%s " % self.humiditytext if full else ""
-		return "%s%s %s" % (text, self.getCurrentVal("humidity"), "%")
+		return self.snapshot.current.humidityFull if full else self.snapshot.current.humidity
 
 	def getRainText(self):
-		return self.getCurrentVal("raintext", "")
+		return self.snapshot.current.rainText
 
 	def getWindSpeed(self):
-		windSpeed, windunit = self.getCurrentVal("windSpeed"), self.windunit
-		if windunit == "km/h" and config.plugins.OAWeather.windspeedMetricUnit.value == "m/s":
-			windSpeed, windunit = str(round(int(windSpeed) / 3.6, 1)), "m/s"
-		return "%s %s" % (windSpeed, windunit)
+		return self.snapshot.current.windSpeed
 
 	def getWindDir(self):
-		val = self.getCurrentVal("windDir")
-		return ("%s °" % val) if val else self.na
+		return self.snapshot.current.windDir
 
 	def getWindDirSign(self):
-		return self.getCurrentVal("windDirSign", "")
+		return self.snapshot.current.windDirSign
 
 	def getWindDirName(self):
-		skydirection = self.getCurrentVal("windDirSign", "* *")
-		if skydirection:
-			skydirection = skydirection.split(" ")
-			return self.skydirs.get(skydirection[1], skydirection[1])
-		else:
-			return self.na
+		return self.snapshot.current.windDirName
 
 	def getWindDirArrow(self):
-		return self.getCurrentVal("windDirSign", " ").split(" ")[0]
+		return self.snapshot.current.windDirArrow
 
 	def getWindDirShort(self):
-		return self.getCurrentVal("windDirSign", " ").split(" ")[1]
+		return self.snapshot.current.windDirShort
 
 	def getWindGusts(self):
-		windGusts, windunit = self.getCurrentVal("windGusts"), self.windunit
-		if windunit == "km/h" and config.plugins.OAWeather.windspeedMetricUnit.value == "m/s":
-			windGusts, windunit = str(round(int(windGusts) / 3.6, 1)), "m/s"
-		return "%s %s" % (windGusts, windunit)
+		return self.snapshot.current.windGusts
 
 	def getUVindex(self):
-		return self.getCurrentVal("uvIndex", "")
+		return self.snapshot.current.uvIndex
 
 	def getVisibility(self):
-		return "%s %s" % (self.getCurrentVal("visibility", self.na), self.visibilityunit)
+		return self.snapshot.current.visibility
 
 	def getPressure(self):
-		return "%s %s" % (self.getCurrentVal("pressure", self.na), self.pressunit)
+		return self.snapshot.current.pressure
 
 	def getAveragePressure(self, day: int):
-		return "%s %s" % (self.getKeyforDay("pressure", day), self.pressunit)
+		return self.snapshot.days[day].averagePressure
 
 	def getMaxTemp(self, day: int):
-		return "%s %s" % (self.getKeyforDay("maxTemp", day), self.tempunit)
+		return self.snapshot.days[day].maxTemp
 
 	def getMinTemp(self, day: int):
-		return "%s %s" % (self.getKeyforDay("minTemp", day), self.tempunit)
+		return self.snapshot.days[day].minTemp
 
 	def getMaxMinTemp(self, day: int):
-		return "%s / %s %s" % (self.getKeyforDay("minTemp", day), self.getKeyforDay("maxTemp", day), self.tempunit)
+		return self.snapshot.days[day].maxMinTemp
 
 	def getMaxFeelsLike(self, day: int):
-		return "%s %s" % (self.getKeyforDay("maxFeelsLike", day), self.tempunit)
+		return self.snapshot.days[day].maxFeelsLike
 
 	def getMinFeelsLike(self, day: int):
-		return "%s %s" % (self.getKeyforDay("minFeelsLike", day), self.tempunit)
+		return self.snapshot.days[day].minFeelsLike
 
 	def getMaxWindSpeed(self, day: int):
-		maxwindspeed, windunit = self.getKeyforDay("maxWindSpeed", day), self.windunit
-		if windunit == "km/h" and config.plugins.OAWeather.windspeedMetricUnit.value == "m/s":
-			maxwindspeed, windunit = str(round(int(maxwindspeed) / 3.6, 1)), "m/s"
-		return "%s %s" % (maxwindspeed, windunit)
+		return self.snapshot.days[day].maxWindSpeed
 
 	def getMinWindSpeed(self, day: int):
-		minwindspeed, windunit = self.getKeyforDay("maxWindSpeed", day), self.windunit
-		if windunit == "km/h" and config.plugins.OAWeather.windspeedMetricUnit.value == "m/s":
-			minwindspeed, windunit = str(round(int(minwindspeed) / 3.6, 1)), "m/s"
-		return "%s %s" % (minwindspeed, windunit)
+		return self.snapshot.days[day].minWindSpeed
 
 	def getDomWindDir(self, day: int):
-		return "%s %s" % (self.getKeyforDay("domWindDir", day), self.tempunit)
+		return self.snapshot.days[day].domWindDir
 
 	def getDomWindDirSign(self, day: int):
-		val = self.getCurrentVal("domWindDirSign")
-		return ("%s °" % val) if val else self.na
+		return self.snapshot.days[day].domWindDirSign
 
 	def getDomWindDirName(self, day: int):
-		skydirection = self.getKeyforDay("domWindDirSign", day)
-		if skydirection:
-			skydirection = skydirection.split(" ")
-			return self.skydirs.get(skydirection[1], skydirection[1])
-		else:
-			return self.na
+		return self.snapshot.days[day].domWindDirName
 
 	def getDomWindDirArrow(self, day: int):
-		return self.getKeyforDay("domWindDirSign", day).split(" ")[0]
+		return self.snapshot.days[day].domWindDirArrow
 
 	def getDomWindDirShort(self, day: int):
-		return self.getKeyforDay("windDirSign", day).split(" ")[1]
+		return self.snapshot.days[day].domWindDirShort
 
 	def getMaxWindGusts(self, day: int):
-		maxWindGusts, windunit = self.getKeyforDay("maxWindGusts", day), self.windunit
-		if windunit == "km/h" and config.plugins.OAWeather.windspeedMetricUnit.value == "m/s":
-			maxWindGusts, windunit = str(round(int(maxWindGusts) / 3.6, 1)), "m/s"
-		return "%s %s" % (maxWindGusts, windunit)
+		return self.snapshot.days[day].maxWindGusts
 
 	def getMaxUvIndex(self, day: int):
-		return "%s" % self.getKeyforDay("maxUvIndex", day, "")
+		return self.snapshot.days[day].maxUvIndex
 
 	def getMaxVisibility(self, day: int):
-		return "%s %s" % (self.getKeyforDay("maxVisibility", day), self.visibilityunit)
+		return self.snapshot.days[day].maxVisibility
 
 	def getPrecipitation(self, day: int, full=False):
-		text = "%s " % self.precipitationtext if full else ""
-		return "%s%s %s" % (text, self.getKeyforDay("precipitation", day), self.getVal("precunit"))
+		return self.snapshot.days[day].precipitationFull if full else self.snapshot.days[day].precipitation
 
 	def getUmbrellaIndex(self, day: int):
-		return self.getKeyforDay("umbrellaIndex", day, "")
+		return self.snapshot.days[day].umbrellaIndex
 
 	def getYahooCode(self, day: int):
-		iconcode = self.getKeyforDay("yahooCode", day, "")
-		nightSwitch = day == 0 and config.plugins.OAWeather.nighticons.value and self.getIsNight()
-		return self.YAHOOnightswitch.get(iconcode, iconcode) if nightSwitch else self.YAHOOdayswitch.get(iconcode, iconcode)
+		return self.snapshot.days[day].yahooCode
 
 	def getMeteoCode(self, day: int):
-		iconcode = self.getKeyforDay("meteoCode", day, "")
-		if day == 0 and config.plugins.OAWeather.nighticons.value and self.getIsNight() and iconcode in self.METEOnightswitch:
-			iconcode = self.METEOnightswitch[iconcode]
-		else:
-			self.METEOdayswitch.get(iconcode, iconcode)
-		return iconcode
+		return self.snapshot.days[day].meteoCode
 
 	def getMoonIllumination(self):
-		moonIllum = self.moonIllumination(self.moonPosition(datetime.now()))
+		return self.astro.moonIllumination
+
+	def getMoonDistance(self):
+		return self.astro.moonDistance
+
+	def getMoonPixFilename(self):
+		return self.astro.moonPixFilename
+
+	def buildAstro(self):  # the moon values only depend on the time, see astroUpdate()
+		now = datetime.now()
+		hourAgo = now - timedelta(hours=1)
+		moonIllum = self.moontable.getIllumination(now)
+		moonDist = self.moontable.getDistance(now)
+		illumArrow, distArrow = "", ""
 		if config.plugins.OAWeather.trendarrows.value:
 			ta = config.plugins.OAWeather.trendarrows.getText()
 			if moonIllum > 0 and ta and len(ta) > 0:
-				illumArrow = f"{ta[0]} " if self.moonIllumination(self.moonPosition(datetime.now() - timedelta(hours=1))) < moonIllum else f"{ta[1]} "
+				illumArrow = f"{ta[0]} " if self.moontable.getIllumination(hourAgo) < moonIllum else f"{ta[1]} "
 			else:
 				illumArrow = "● "
-		else:
-			illumArrow = ""
-		return "%s%s %s" % (illumArrow, round(moonIllum, 1), "%")
-
-	def getMoonDistance(self):
-		moonDist = self.moonDistance(datetime.now())
-		if config.plugins.OAWeather.trendarrows.value:
-			ta = config.plugins.OAWeather.trendarrows.getText()
-			distArrow = f"{ta[0]} " if self.moonDistance(datetime.now() - timedelta(hours=1)) < moonDist else f"{ta[1]} "
-		else:
-			distArrow = ""
-		return "%s%s %s" % (distArrow, round(moonDist), "km")
-
-	def getMoonPixFilename(self):
+			distArrow = f"{ta[0]} " if self.moontable.getDistance(hourAgo) < moonDist else f"{ta[1]} "
 		moonPhases = ["new_moon", "waxing_crescent", "first_quarter", "waxing_gibbous", "full_moon", "waning_gibbous", "last_quarter", "waning_crescent"]
-		return "%s.png" % moonPhases[self.moonPhase(self.moonPosition(datetime.now()))]
-
-	def moonIllumination(self, pos):
-		illum = 100 - abs((cos(pi * pos) + 0j) ** 1.7 * 100)
-		return abs(illum - 1) / .99 if illum - 1 > 0 else 0.0
-
-	# Author: Sean B. Palmer, Source: http://inamidst.com/code/moonphase.py
-	def moonPosition(self, now=None):
-		if now is None:
-			now = datetime.now()
-		diff = now - datetime(2001, 1, 1)
-		days = diff.days + diff.seconds / 86400
-		lunations = 0.20439731 + days * 0.03386319269
-		return lunations % float(1)
-
-	def moonPhase(self, pos):
-		index = (pos * float(8)) + float("0.5")
-		index = floor(index)
-		return int(index) & 7
-
-	# series expansion of the moon orbital elements from Chapront und Chapront-Touzé
-	# Sources: htps://de.wikipedia.org/wiki/Mondbahn, http://articles.adsabs.harvard.edu/full/1994A%26A...282..663S
-	def moonDistance(self, now=None):
-		if now is None:
-			now = datetime.now()
-		diff = now - datetime(2000, 1, 1, 12, 0, 0)
-		t = diff.total_seconds() / 86400.0
-		GM = (134.96341138 + 13.064992953630 * t) * pi / 180.0
-		DD = (297.85020420 + 12.190749117502 * t) * pi / 180.0
-		return 385000.5584 - 20905.3550 * cos(GM) - 3699.1109 * cos(DD - GM) - 2955.9676 * cos(DD) - 569.9251 * cos(2.0 * GM)
+		return AstroSnapshot(
+			moonIllumination="%s%s %s" % (illumArrow, round(moonIllum, 1), "%"),
+			moonDistance="%s%s %s" % (distArrow, round(moonDist), "km"),
+			moonPixFilename="%s.png" % moonPhases[self.moontable.getPhase(now)]
+			)
+
+	def astroUpdate(self):  # runs every ASTROINTERVAL, the moon widgets are updated without a weather fetch
+		astro = self.buildAstro()
+		if (astro.moonIllumination, astro.moonDistance, astro.moonPixFilename) != (self.astro.moonIllumination, self.astro.moonDistance, self.astro.moonPixFilename):
+			self.astro = astro
+			self.changed((self.CHANGED_SPECIFIC, {"astro"}))
 
 	def getKeyforDay(self, key: str, day: int, default: str = _("n/a")):
-		self.debug("getKeyforDay key:%s day:%s default:%s" % (key, day, default))
 		if day == 0:
-			return self.data.get("current", {}).get(key, default) if self.data else default
+			val = self.data.get("current", {}).get(key, default) if self.data else default
 		else:
-			index = day - 1
-			val = self.data.get("forecast", {}).get(index, {}).get(key, default)
-			self.debug("getKeyforDay key:%s day:%s / val:%s" % (key, day, val))
-			return val
+			val = self.data.get("forecast", {}).get(day - 1, {}).get(key, default)
+		self.debug("getKeyforDay key:%s day:%s default:%s val:%s", key, day, default, val)
+		return val
 
 	def destroy(self):
 		weatherhandler.onUpdate.remove(self.callbackUpdate)
+		config.plugins.OAWeather.windspeedMetricUnit.removeNotifier(self.configChanged)
+		config.plugins.OAWeather.nighticons.removeNotifier(self.configChanged)
+		config.plugins.OAWeather.trendarrows.removeNotifier(self.configChanged)
+		self.astroTimer.stop()
+		self.modelTimer.stop()
 		Source.destroy(self)
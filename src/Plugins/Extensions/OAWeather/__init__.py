@@ -1,3 +1,6 @@
+from collections import deque
+from os import environ
+from time import localtime, perf_counter, strftime, time
 from Components.Language import language
 from Tools.Directories import resolveFilename, SCOPE_PLUGINS
 import gettext
@@ -19,5 +22,37 @@ def _(txt):
 	return t
 
 
+class DebugLog():
+	def __init__(self, name, enabled=False, history=0):
+		self.name = name
+		self.enabled = enabled  # checked before any formatting, so disabled debug output costs no string building
+		self.history = deque(maxlen=history) if history else None  # ring buffer of unformatted recent entries
+
+	def __call__(self, text, *args):  # e.g. self.debug("key:%s day:%s", key, day)
+		if self.history is not None:
+			self.history.append((time(), text, args))
+		if self.enabled:
+			print("[OAWeather] %s DEBUG %s" % (self.name, text % args if args else text))
+
+	def dump(self):
+		if self.history:
+			print("[OAWeather] %s DEBUG last %d entries:" % (self.name, len(self.history)))
+			for timestamp, text, args in self.history:
+				print("[OAWeather] %s DEBUG %s %s" % (self.name, strftime("%H:%M:%S", localtime(timestamp)), text % args if args else text))
+
+
+class StartupProfile():  # run enigma2 with OAWEATHER_PROFILE=1 to see how long each part of the plugin start takes
+	def __init__(self, name):
+		self.name = name
+		self.enabled = environ.get("OAWEATHER_PROFILE") == "1"
+		self.last = perf_counter()
+
+	def __call__(self, part):  # time since the previous call
+		if self.enabled:
+			now = perf_counter()
+			print("[OAWeather] %s PROFILE %s: %.1f ms" % (self.name, part, (now - self.last) * 1000))
+			self.last = now
+
+
 localeInit()
 language.addCallback(localeInit)
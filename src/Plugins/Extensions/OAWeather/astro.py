@@ -0,0 +1,184 @@
+# Copyright (C) 2025 jbleyel, Mr.Servo, Stein17
+#
+# OAWeather is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dogtag is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with OAWeather.  If not, see <http://www.gnu.org/licenses/>.
+
+# Offline astronomical calculations. This module has no enigma2 dependencies.
+
+from datetime import datetime, timedelta
+from math import acos, asin, atan2, cos, floor, pi, sin, sqrt, tan
+
+J2000 = datetime(2000, 1, 1, 12, 0, 0)  # epoch of the formulas below, UTC
+RAD = pi / 180.0
+OBLIQUITY = RAD * 23.4397
+
+
+def moonIllumination(pos):
+	illum = 100 - abs((cos(pi * pos) + 0j) ** 1.7 * 100)
+	return abs(illum - 1) / .99 if illum - 1 > 0 else 0.0
+
+
+# Author: Sean B. Palmer, Source: http://inamidst.com/code/moonphase.py
+def moonPosition(now=None):
+	if now is None:
+		now = datetime.now()
+	diff = now - datetime(2001, 1, 1)
+	days = diff.days + diff.seconds / 86400
+	lunations = 0.20439731 + days * 0.03386319269
+	return lunations % float(1)
+
+
+def moonPhase(pos):
+	index = (pos * float(8)) + float("0.5")
+	index = floor(index)
+	return int(index) & 7
+
+
+# series expansion of the moon orbital elements from Chapront und Chapront-Touzé
+# Sources: htps://de.wikipedia.org/wiki/Mondbahn, http://articles.adsabs.harvard.edu/full/1994A%26A...282..663S
+def moonDistance(now=None):
+	if now is None:
+		now = datetime.now()
+	diff = now - datetime(2000, 1, 1, 12, 0, 0)
+	t = diff.total_seconds() / 86400.0
+	GM = (134.96341138 + 13.064992953630 * t) * pi / 180.0
+	DD = (297.85020420 + 12.190749117502 * t) * pi / 180.0
+	return 385000.5584 - 20905.3550 * cos(GM) - 3699.1109 * cos(DD - GM) - 2955.9676 * cos(DD) - 569.9251 * cos(2.0 * GM)
+
+
+class MoonTable():  # moon values at fixed steps, lookups interpolate between two steps
+	def __init__(self, days=3, step=3600):
+		self.days = days
+		self.step = step  # seconds
+		self.start = None
+		self.positions = []
+		self.illuminations = []
+		self.distances = []
+
+	def build(self, start):  # one hour before start is included for the trend arrows
+		self.start = start.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+		times = [self.start + timedelta(seconds=self.step * idx) for idx in range(self.days * 86400 // self.step + 2)]
+		self.positions = [moonPosition(now) for now in times]
+		self.illuminations = [moonIllumination(pos) for pos in self.positions]
+		self.distances = [moonDistance(now) for now in times]
+
+	def locate(self, now):  # returns the table index and the fraction to the next step
+		offset = (now - self.start).total_seconds() / self.step if self.start else -1
+		if offset < 0 or offset >= len(self.positions) - 1:  # outside of the table: start a new one
+			self.build(now)
+			offset = (now - self.start).total_seconds() / self.step
+		index = int(offset)
+		return index, offset - index
+
+	def interpolate(self, column, now):
+		index, fraction = self.locate(now)  # may rebuild the table, so get the column afterwards
+		values = getattr(self, column)
+		return values[index] + (values[index + 1] - values[index]) * fraction
+
+	def getPosition(self, now=None):
+		index, fraction = self.locate(now or datetime.now())
+		delta = (self.positions[index + 1] - self.positions[index]) % 1.0  # the position wraps from 1 to 0 at new moon
+		return (self.positions[index] + delta * fraction) % 1.0
+
+	def getIllumination(self, now=None):
+		return self.interpolate("illuminations", now or datetime.now())
+
+	def getDistance(self, now=None):
+		return self.interpolate("distances", now or datetime.now())
+
+	def getPhase(self, now=None):
+		return moonPhase(self.getPosition(now))
+
+
+# Sunrise equation, Source: https://en.wikipedia.org/wiki/Sunrise_equation
+def sunTimes(day, lat, lon):  # UTC datetimes of sunrise and sunset for a local calendar day, None at polar day or night
+	jstar = (datetime(day.year, day.month, day.day, 12) - J2000).days - lon / 360.0  # mean solar noon in days since J2000
+	anomaly = RAD * ((357.5291 + 0.98560028 * jstar) % 360)
+	center = 1.9148 * sin(anomaly) + 0.02 * sin(2 * anomaly) + 0.0003 * sin(3 * anomaly)
+	longitude = RAD * ((anomaly / RAD + center + 180 + 102.9372) % 360)
+	transit = jstar + 0.0053 * sin(anomaly) - 0.0069 * sin(2 * longitude)
+	sinDec = sin(longitude) * sin(OBLIQUITY)
+	cosHour = (sin(RAD * -0.833) - sin(RAD * lat) * sinDec) / (cos(RAD * lat) * cos(asin(sinDec)))
+	if not -1 <= cosHour <= 1:
+		return None, None
+	halfday = acos(cosHour) / (2 * pi)
+	return J2000 + timedelta(days=transit - halfday), J2000 + timedelta(days=transit + halfday)
+
+
+# Low precision moon position and rise/set search as in SunCalc, Source: https://github.com/mourner/suncalc
+def moonAltitude(days, lat, lon):  # days since J2000, returns radians above the horizon
+	meanLon = RAD * (218.316 + 13.176396 * days)
+	anomaly = RAD * (134.963 + 13.064993 * days)
+	distance = RAD * (93.272 + 13.229350 * days)
+	eclLon = meanLon + RAD * 6.289 * sin(anomaly)
+	eclLat = RAD * 5.128 * sin(distance)
+	rightAsc = atan2(sin(eclLon) * cos(OBLIQUITY) - tan(eclLat) * sin(OBLIQUITY), cos(eclLon))
+	dec = asin(sin(eclLat) * cos(OBLIQUITY) + cos(eclLat) * sin(OBLIQUITY) * sin(eclLon))
+	hourAngle = RAD * (280.16 + 360.9856235 * days) + RAD * lon - rightAsc
+	phi = RAD * lat
+	altitude = asin(sin(phi) * sin(dec) + cos(phi) * cos(dec) * cos(hourAngle))
+	height = max(altitude, 0)
+	return altitude + 0.0002967 / tan(height + 0.00312536 / (height + 0.08901179))  # refraction
+
+
+def moonTimes(altitudes):  # hours of moonrise and moonset within 24 hourly altitudes (+1), None if there is none
+	moonrise = moonset = None
+	h0 = altitudes[0]
+	for hour in range(1, 24, 2):
+		h1, h2 = altitudes[hour], altitudes[hour + 1]
+		a = (h0 + h2) / 2 - h1
+		b = (h2 - h0) / 2
+		roots, x1, x2, ye = 0, 0, 0, h1
+		if a:
+			xe = -b / (2 * a)
+			ye = (a * xe + b) * xe + h1
+			discriminant = b * b - 4 * a * h1
+			if discriminant >= 0:
+				dx = sqrt(discriminant) / (abs(a) * 2)
+				x1, x2 = xe - dx, xe + dx
+				roots = (abs(x1) <= 1) + (abs(x2) <= 1)
+				if x1 < -1:
+					x1 = x2
+		if roots == 1:
+			if h0 < 0:
+				moonrise = hour + x1
+			else:
+				moonset = hour + x1
+		elif roots == 2:
+			moonrise = hour + (x2 if ye < 0 else x1)
+			moonset = hour + (x1 if ye < 0 else x2)
+		if moonrise is not None and moonset is not None:
+			break
+		h0 = h2
+	return moonrise, moonset
+
+
+def riseSetTimes(days, lat, lon, utcoffset):  # [(sunrise, sunset, moonrise, moonset), ...] as local 'YYYY-MM-DDTHH:MM' per day, "" if there is none
+	def localTime(utctime):
+		return (utctime + utcoffset).isoformat(timespec="minutes") if utctime else ""
+
+	result = []
+	if days:
+		start = datetime(days[0].year, days[0].month, days[0].day) - utcoffset  # local midnight of the first day in UTC
+		startDays = (start - J2000).total_seconds() / 86400.0
+		count = (days[-1] - days[0]).days + 1
+		altitudes = [moonAltitude(startDays + hour / 24.0, lat, lon) - RAD * 0.133 for hour in range(count * 24 + 1)]  # all days in one pass
+		for day in days:
+			sunrise, sunset = sunTimes(day, lat, lon)
+			offset = (day - days[0]).days * 24
+			midnight = start + timedelta(hours=offset)
+			moonrise, moonset = moonTimes(altitudes[offset:offset + 25])
+			result.append((localTime(sunrise), localTime(sunset),
+						localTime(midnight + timedelta(hours=moonrise) if moonrise is not None else None),
+						localTime(midnight + timedelta(hours=moonset) if moonset is not None else None)))
+	return result
@@ -0,0 +1,131 @@
+# Copyright (C) 2025 jbleyel, Mr.Servo, Stein17
+#
+# OAWeather is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dogtag is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with OAWeather.  If not, see <http://www.gnu.org/licenses/>.
+
+# Favorites file and index. This module has no enigma2 dependencies.
+
+from json import dumps, loads
+from math import floor
+from os import fsync, replace
+from os.path import exists
+from pickle import Unpickler, UnpicklingError
+
+MODULE_NAME = "OAWeather"
+DISTANCE = 0.02  # locations closer than this (in degrees) are regarded as the same place
+
+
+def isDifferentLocation(geodata1, geodata2):
+	return ((geodata1[1] - geodata2[1])**2 + (geodata1[2] - geodata2[2])**2)**.5 > DISTANCE
+
+
+class FavoriteUnpickler(Unpickler):  # the former favorites file only contains lists, tuples, strings and numbers
+	def find_class(self, module, name):
+		raise UnpicklingError("'%s.%s' is not allowed in the favorites file" % (module, name))
+
+
+class FavoriteFile():  # favorites as JSON, the former pickle file is converted once
+	def __init__(self, filename, picklefile):
+		self.filename = filename
+		self.picklefile = picklefile
+		self.saved = None  # file content of the last read or write
+
+	def read(self):  # returns the favorites (None if there are none) and whether they still have to be written
+		if exists(self.filename):
+			try:
+				with open(self.filename, "r") as fd:
+					content = fd.read()
+				favoriteList = [(location[0], location[1], location[2]) for location in loads(content)]
+				self.saved = content
+				return favoriteList, False
+			except Exception as err:  # keep the faulty file for inspection, it will be replaced on the next save
+				print("[%s] error in reading favorites file: %s" % (MODULE_NAME, str(err)))
+				return None, False
+		if exists(self.picklefile):
+			try:
+				with open(self.picklefile, "rb") as fd:
+					return [(location[0], location[1], location[2]) for location in FavoriteUnpickler(fd).load()], True
+			except Exception as err:  # keep the former file, so the conversion is tried again on the next start
+				print("[%s] error in converting favorites file: %s" % (MODULE_NAME, str(err)))
+				return None, False
+		return None, True
+
+	def write(self, favoriteList):  # writes the file only if the favorites have changed
+		content = dumps(favoriteList, separators=(",", ":"))
+		if content != self.saved:
+			tmpfile = "%s.tmp" % self.filename
+			try:
+				with open(tmpfile, "w") as fd:
+					fd.write(content)
+					fd.flush()
+					fsync(fd.fileno())
+				replace(tmpfile, self.filename)  # atomic, so a power cut can't leave a truncated file
+				self.saved = content
+			except Exception as err:
+				print("[%s] error in writing favorites file: %s" % (MODULE_NAME, str(err)))
+
+
+class FavoriteIndex():  # favorites with lookup by location and a grid for finding nearby locations
+	CELL = DISTANCE
+
+	def __init__(self, locations=None):
+		self.set(locations or [])
+
+	def set(self, locations):
+		self.locations = []
+		self.positions = {}  # {location: index in self.locations}
+		self.grid = {}  # {cell: [location, ...]}
+		for location in locations:
+			self.append(location)
+
+	def getCell(self, location):
+		return floor(location[1] / self.CELL), floor(location[2] / self.CELL)
+
+	def append(self, location):
+		location = tuple(location)
+		self.positions.setdefault(location, len(self.locations))
+		self.grid.setdefault(self.getCell(location), []).append(location)
+		self.locations.append(location)
+
+	def replace(self, index, location):
+		location = tuple(location)
+		previous = self.locations[index]
+		self.grid[self.getCell(previous)].remove(previous)
+		if self.positions.get(previous) == index:
+			del self.positions[previous]
+		self.locations[index] = location
+		self.positions.setdefault(location, index)
+		self.grid.setdefault(self.getCell(location), []).append(location)
+
+	def remove(self, location):
+		if location in self.positions:
+			del self.locations[self.positions[location]]
+			self.set(self.locations[:])
+
+	def indexOf(self, location, default=0):
+		return self.positions.get(tuple(location), default)
+
+	def findNear(self, location):  # a location closer than CELL can only be in the 3x3 cells around its own one
+		col, row = self.getCell(location)
+		for cell in ((col + dcol, row + drow) for dcol in (-1, 0, 1) for drow in (-1, 0, 1)):
+			for favorite in self.grid.get(cell, ()):
+				if not isDifferentLocation(location, favorite):
+					return favorite
+		return None
+
+	def add(self, newcomer):  # a newcomer near an existing favorite replaces it only if it has more information
+		favorite = self.findNear(newcomer)
+		if favorite is None:
+			self.append(newcomer)
+		elif len(newcomer[0]) >= len(favorite[0]):
+			self.replace(self.positions[favorite], newcomer)
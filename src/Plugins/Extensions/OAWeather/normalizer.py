@@ -0,0 +1,293 @@
+# Copyright (C) 2025 jbleyel, Mr.Servo, Stein17
+#
+# OAWeather is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dogtag is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with OAWeather.  If not, see <http://www.gnu.org/licenses/>.
+
+# Turns the full payload of each weather service into one provider independent model.
+# This module has no enigma2 dependencies, so it can be run against recorded payloads.
+
+from datetime import date, datetime, timedelta
+from hashlib import md5
+from json import dumps
+
+try:
+	from .astro import riseSetTimes
+except ImportError:  # imported directly from the plugin folder, e.g. by the tests
+	from astro import riseSetTimes
+
+numpy = None  # imported on first use by roundColumn(), False if not available
+
+NUMERICFIELDS = ("pressure", "temp", "feels", "humidity", "precip", "windSpeed", "windDir", "windGusts", "uvIndex", "visibility")
+TEXTFIELDS = ("time", "shortDesc", "longDesc", "yahooCode")  # time = local time 'YYYY-MM-DDTHH:MM'
+
+
+class DayRecord():
+	__slots__ = ("date", "rows", "sunrise", "sunset", "moonrise", "moonset")  # rows = range of indices into the hourly columns
+
+	def __init__(self, date, rows, sunrise="", sunset="", moonrise="", moonset=""):
+		self.date = date
+		self.rows = rows
+		self.sunrise = sunrise
+		self.sunset = sunset
+		self.moonrise = moonrise
+		self.moonset = moonset
+
+
+class WeatherModel():
+	__slots__ = ("service", "columns", "days")
+
+	def __init__(self, service, columns, days):
+		self.service = service  # "MSN", "OMW" or "OWM"
+		self.columns = columns  # {field: [value per hour]}, numeric fields are rounded, missing values are None or NaN
+		self.days = days  # [DayRecord, ...]
+
+	def hasMoonData(self):
+		return any(day.moonrise or day.moonset for day in self.days)
+
+
+def isValue(value):
+	return value is not None and value == value  # NaN is not equal to itself
+
+
+def toNumber(value):  # services send null, "" or text for missing values, those become None
+	try:
+		value = float(value)
+	except (TypeError, ValueError):
+		return None
+	return value if value == value else None
+
+
+def scaled(value, factor):  # e.g. a probability of 0..1 to percent
+	value = toNumber(value)
+	return value * factor if value is not None else None
+
+
+def fitColumn(values, count):  # a column with missing or surplus values is cut or padded to the number of hours
+	values = values or []
+	return values[:count] if len(values) >= count else values + [None] * (count - len(values))
+
+
+def roundColumn(values, divisor=1):  # rounds a whole column at once, missing values become None or NaN
+	global numpy
+	if numpy is None:
+		try:
+			import numpy
+		except ImportError:  # numpy is optional, use plain lists then
+			numpy = False
+	if numpy:
+		try:
+			array = numpy.array(values, dtype=float)
+		except (TypeError, ValueError):  # text in a numeric column
+			array = numpy.array([toNumber(value) for value in values], dtype=float)
+		return numpy.rint(array / divisor).tolist()
+	return [round(value / divisor) if value is not None else None for value in map(toNumber, values)]
+
+
+def isoMinutes(isotime):  # local wall time of an ISO string, cut to minutes
+	return datetime.fromisoformat(isotime).replace(tzinfo=None).isoformat(timespec="minutes") if isotime else ""
+
+
+def tsMinutes(timestamp, utcoffset):  # local wall time of an UTC timestamp, cut to minutes
+	return (datetime(1970, 1, 1) + timedelta(seconds=timestamp) + utcoffset).isoformat(timespec="minutes") if timestamp else ""
+
+
+def localOffset():  # UTC offset of the receiver, used if the service doesn't tell the offset of the location
+	return datetime.now().astimezone().utcoffset()
+
+
+def fillAstro(days, location, utcoffset):  # calculate missing sun and moon times of all days at once
+	missing = [day for day in days if day.date and not (day.sunrise and day.sunset and day.moonrise and day.moonset)]
+	if missing and location:
+		try:
+			lon, lat = float(location[1]), float(location[2])
+		except (IndexError, TypeError, ValueError):
+			return
+		dates = [date.fromisoformat(day.date) for day in missing]
+		for day, (sunrise, sunset, moonrise, moonset) in zip(missing, riseSetTimes(dates, lat, lon, utcoffset)):  # values of the service have precedence
+			day.sunrise = day.sunrise or sunrise
+			day.sunset = day.sunset or sunset
+			day.moonrise = day.moonrise or moonrise
+			day.moonset = day.moonset or moonset
+
+
+class ColumnBuilder():  # collects provider rows one by one into columns
+	def __init__(self, service, convert2icon, location=None, utcoffset=None):
+		self.service = service
+		self.convert2icon = convert2icon
+		self.location = location
+		self.utcoffset = utcoffset
+		self.iconcodes = {}  # provider code -> yahoo code, each code is converted only once
+		self.columns = {field: [] for field in NUMERICFIELDS + TEXTFIELDS}
+		self.days = []
+
+	def addRow(self, time, iconcode, shortDesc="", longDesc="", **values):
+		columns = self.columns
+		yahoocode = self.iconcodes.get(iconcode)
+		if yahoocode is None:
+			yahoocode = self.convert2icon(self.service, iconcode).get("yahooCode")
+			self.iconcodes[iconcode] = yahoocode
+		columns["time"].append(time)
+		columns["shortDesc"].append(shortDesc)
+		columns["longDesc"].append(longDesc)
+		columns["yahooCode"].append(yahoocode)
+		for field in NUMERICFIELDS:
+			columns[field].append(values.get(field))
+
+	def startDay(self, date, sunrise="", sunset="", moonrise="", moonset=""):
+		start = len(self.columns["time"])
+		self.days.append(DayRecord(date, range(start, start), sunrise, sunset, moonrise, moonset))
+
+	def build(self, divisors=None):
+		end = len(self.columns["time"])
+		for index, day in enumerate(self.days):  # close the row ranges
+			stop = self.days[index + 1].rows.start if index + 1 < len(self.days) else end
+			day.rows = range(day.rows.start, stop)
+		return buildModel(self.service, self.columns, self.days, divisors, self.location, self.utcoffset)
+
+
+def buildModel(service, columns, days, divisors=None, location=None, utcoffset=None):
+	fillAstro(days, location, utcoffset or localOffset())
+	divisors = divisors or {}
+	for field in NUMERICFIELDS:
+		columns[field] = roundColumn(columns[field], divisors.get(field, 1))
+	times = columns["time"]
+	isNight = [False] * len(times)
+	for day in days:  # ISO strings of the same format compare like datetimes
+		if day.sunrise and day.sunset:
+			for idx in day.rows:
+				isNight[idx] = times[idx] < day.sunrise or times[idx] > day.sunset
+	columns["isNight"] = isNight
+	return WeatherModel(service, columns, days)
+
+
+def normalizeMSN(fulldata, convert2icon, location=None):
+	builder = ColumnBuilder("MSN", convert2icon, location)
+	responses = fulldata.get("responses")
+	if responses:
+		weather = (responses[0].get("weather") or [{}])[0]
+		current = weather.get("current") or {}
+		days = (weather.get("forecast") or {}).get("days") or []
+		created = current.get("created")
+		if created:
+			builder.utcoffset = datetime.fromisoformat(created).utcoffset()
+		for index, day in enumerate(days):
+			almanac = day.get("almanac") or {}
+			hourly = day.get("hourly") or []
+			sunrise = isoMinutes(almanac.get("sunrise", ""))
+			firstHour = hourly[0].get("valid", "") if hourly else ""
+			builder.startDay((sunrise or firstHour or (created if not index else ""))[:10], sunrise, isoMinutes(almanac.get("sunset", "")), isoMinutes(almanac.get("moonrise", "")), isoMinutes(almanac.get("moonset", "")))
+			if not index:  # the first day starts with the current data
+				builder.addRow(isoMinutes(current.get("created")), current.get("symbol", ""), current.get("pvdrCap", ""), current.get("raintext", ""),
+							pressure=current.get("baro", 0), temp=current.get("temp", 0), feels=current.get("feels", 0), humidity=current.get("rh", 0),
+							precip=hourly[0].get("precip", 0) if hourly else None,  # workaround: use value from next hour if available
+							windSpeed=current.get("windSpd", 0), windDir=current.get("windDir", 0), windGusts=current.get("windGust", 0),
+							uvIndex=current.get("uv", 0), visibility=current.get("vis", 0))
+			for hour in hourly:
+				builder.addRow(isoMinutes(hour.get("valid")), hour.get("symbol", ""), hour.get("pvdrCap", ""), hour.get("summary", ""),
+							pressure=hour.get("baro", 0), temp=hour.get("temp", 0), feels=hour.get("feels", 0), humidity=hour.get("rh", 0),
+							precip=hour.get("precip", 0), windSpeed=hour.get("windSpd", 0), windDir=hour.get("windDir", 0), windGusts=hour.get("windGust", 0),
+							uvIndex=hour.get("uv", 0), visibility=hour.get("vis", 0))
+	return builder.build()
+
+
+def normalizeOMW(fulldata, convert2icon, location=None):  # Open-Meteo already delivers columns
+	daily = fulldata.get("daily") or {}
+	sunriseList = daily.get("sunrise") or []
+	sunsetList = daily.get("sunset") or []
+	hourly = fulldata.get("hourly") or {}
+	timeList = hourly.get("time") or []
+	count = len(timeList)
+	iconcodes = {}
+	yahooCodes = []
+	for wCode in fitColumn(hourly.get("weathercode"), count):
+		yahoocode = iconcodes.get(wCode)
+		if yahoocode is None:
+			yahoocode = convert2icon("OMW", wCode).get("yahooCode")  # e.g. '1' -> {'yahooCode': '34', 'meteoCode': 'B'}
+			iconcodes[wCode] = yahoocode
+		yahooCodes.append(yahoocode)
+	columns = {
+		"time": timeList,
+		"pressure": fitColumn(hourly.get("pressure_msl"), count),
+		"temp": fitColumn(hourly.get("temperature_2m"), count),
+		"feels": fitColumn(hourly.get("apparent_temperature"), count),
+		"humidity": fitColumn(hourly.get("relativehumidity_2m"), count),
+		"precip": fitColumn(hourly.get("precipitation_probability"), count),
+		"windSpeed": fitColumn(hourly.get("windspeed_10m"), count),
+		"windDir": fitColumn(hourly.get("winddirection_10m"), count),
+		"windGusts": fitColumn(hourly.get("wind_gusts_10m"), count),
+		"uvIndex": fitColumn(hourly.get("uv_index"), count),
+		"visibility": fitColumn(hourly.get("visibility"), count),
+		"shortDesc": [""] * count,  # OMW does not support description texts at all
+		"longDesc": [""] * count,
+		"yahooCode": yahooCodes
+	}
+	days, start = [], 0
+	for idx in range(1, count + 1):  # bucket rows by the date part of 'YYYY-MM-DDTHH:MM'
+		if idx == count or timeList[idx][:10] != timeList[start][:10]:
+			daynum = len(days)
+			sunrise = sunriseList[daynum] if daynum < len(sunriseList) and sunriseList[daynum] else ""
+			sunset = sunsetList[daynum] if daynum < len(sunsetList) and sunsetList[daynum] else ""
+			days.append(DayRecord(timeList[start][:10], range(start, idx), sunrise, sunset))  # OMW does not support moonrise / moonset at all, see fillAstro()
+			start = idx
+	utcoffset = fulldata.get("utc_offset_seconds")
+	return buildModel("OMW", columns, days, {"visibility": 1000}, location, timedelta(seconds=utcoffset) if utcoffset is not None else None)
+
+
+def normalizeOWM(fulldata, convert2icon, location=None):  # all times are converted to the local time of the location
+	hourly = fulldata.get("list") or []
+	city = fulldata.get("city") or {}
+	utcoffset = timedelta(seconds=city["timezone"]) if city.get("timezone") is not None else localOffset()
+	builder = ColumnBuilder("OWM", convert2icon, location, utcoffset)
+	if hourly:
+		sunrise, sunset = tsMinutes(city.get("sunrise", 0), utcoffset), tsMinutes(city.get("sunset", 0), utcoffset)  # OWM only supports sunrise/sunset of today, see fillAstro()
+		timeTs = fulldata.get("dt", 0)
+		currtime = tsMinutes(timeTs, utcoffset)
+		builder.startDay(currtime[:10], sunrise, sunset)
+		main, wind = fulldata.get("main") or {}, fulldata.get("wind") or {}
+		weather = (fulldata.get("weather") or [{}])[0]
+		builder.addRow(currtime, weather.get("id", "n/a"), weather.get("description", ""),
+					pressure=main.get("pressure", 0), temp=main.get("temp", 0), feels=main.get("feels_like", 0), humidity=main.get("humidity", 0),
+					precip=scaled(hourly[0].get("pop", 0), 100), windSpeed=wind.get("speed", 0), windDir=wind.get("deg", 0),
+					windGusts=(hourly[0].get("wind") or {}).get("gust", 0), visibility=fulldata.get("visibility", 0))  # OWM does not support UV-index at all
+		currday = currtime[:10]
+		for hour in hourly:
+			isotime = tsMinutes(hour.get("dt", 0), utcoffset)
+			if isotime > currtime:  # only future values
+				if isotime[:10] > currday:  # is a new day?
+					currday = isotime[:10]
+					builder.startDay(currday)
+				main, wind = hour.get("main") or {}, hour.get("wind") or {}
+				weather = (hour.get("weather") or [{}])[0]
+				builder.addRow(isotime, weather.get("id", "n/a"), weather.get("description", ""),
+							pressure=main.get("pressure", 0), temp=main.get("temp", 0), feels=main.get("feels_like", 0), humidity=main.get("humidity", 0),
+							precip=scaled(hour.get("pop", 0), 100), windSpeed=wind.get("speed", 0), windDir=wind.get("deg", 0), windGusts=wind.get("gust", 0),
+							visibility=hour.get("visibility", 0))
+	return builder.build({"visibility": 1000})
+
+
+def normalize(service, fulldata, convert2icon, location=None):  # service as in config: "MSN", "OpenMeteo" or "OpenWeather", location = (city, lon, lat)
+	normalizer = {"MSN": normalizeMSN, "OpenMeteo": normalizeOMW, "OpenWeather": normalizeOWM}.get(service)
+	return normalizer(fulldata, convert2icon, location) if normalizer and fulldata else None
+
+
+def fingerprint(data, model=None):  # digest per section of the reduced data and the model, used to detect what has changed
+	sections = {"info": {key: value for key, value in data.items() if key not in ("current", "forecast")}, "current": data.get("current", {})}
+	for day, forecast in data.get("forecast", {}).items():
+		sections["forecast%s" % day] = forecast
+	if model:
+		sections["hourly"] = (model.columns, [(day.date, day.rows.start, day.rows.stop, day.sunrise, day.sunset, day.moonrise, day.moonset) for day in model.days])
+	return {section: md5(dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest() for section, value in sections.items()}
+
+
+def changedSections(old, new):  # names of all sections which differ, also the added and removed ones
+	return {section for section in set(old) | set(new) if old.get(section) != new.get(section)}
@@ -15,12 +15,20 @@
 
 # Some parts are taken from MetrixHD skin and MSNWeather Plugin.
 
+from . import StartupProfile
+profile = StartupProfile("plugin")
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from os import remove, listdir
-from os.path import isfile, exists, getmtime, join
-from pickle import dump, load
+from gzip import open as gzip_open
+from json import dump as json_dump, load as json_load
+from math import ceil
+from os import fsync, listdir, replace
+from os.path import getmtime, isdir, isfile, exists, join
+from random import uniform
+from threading import Lock
 from time import time
-from twisted.internet.reactor import callInThread
+from traceback import print_exc
+from twisted.internet.reactor import callFromThread, callInThread
 from xml.etree.ElementTree import tostring, parse
 from enigma import eTimer, addFont
 from Components.ActionMap import ActionMap, HelpableActionMap
@@ -37,29 +45,45 @@ from Screens.Setup import Setup
 from Screens.VirtualKeyBoard import VirtualKeyBoard
 from Tools.Directories import SCOPE_CONFIG, SCOPE_PLUGINS, SCOPE_SKINS, SCOPE_FONTS, resolveFilename
 from Tools.LoadPixmap import LoadPixmap
-from Tools.Weatherinfo import Weatherinfo
 
 from . import __version__, _
+from .favorites import FavoriteFile, FavoriteIndex, isDifferentLocation
+from .normalizer import changedSections, fingerprint, isValue, normalize
+profile("imports")
+
+MODULE_NAME = "OAWeather"
+CACHEFILE = resolveFilename(SCOPE_CONFIG, "OAWeather.dat")
+PLUGINPATH = join(resolveFilename(SCOPE_PLUGINS), 'Extensions/OAWeather')
 
 
 class WeatherHelper():
 	def __init__(self):
-		self.favoritefile = resolveFilename(SCOPE_CONFIG, "oaweather_fav.dat")
+		self.favoritefile = FavoriteFile(resolveFilename(SCOPE_CONFIG, "oaweather_fav.json"), resolveFilename(SCOPE_CONFIG, "oaweather_fav.dat"))
 		self.locationDefault = ("Hamburg, DE", 10.00065, 53.55034)
-		self.favoriteList = []
+		self.favorites = FavoriteIndex()
+		self.favoriteList = self.favorites.locations
+		self.screens = {}  # {screen name: skin text} of skin.xml
+		self.skins = {}  # {screen name: skin text with substituted placeholders}
+		self.skinMtime = None  # modification time of the parsed skin.xml
+		self.fontRegistered = False
 
 	def readFavoriteList(self):
-		if exists(self.favoritefile):
-			with open(self.favoritefile, "rb") as file:
-				favoriteList = load(file)
-			self.setFavoriteList(favoriteList)
+		favoriteList, write = self.favoritefile.read()
+		if write:
+			self.saveFavoriteList(favoriteList or [self.locationDefault])
 		else:
-			self.setFavoriteList([self.locationDefault])
-			with open(self.favoritefile, "wb") as fd:
-				dump(self.favoriteList, fd, protocol=5)  # Force version 5 to be compatible with python < 3.13
+			self.setFavoriteList(favoriteList or [self.locationDefault])
 
 	def setFavoriteList(self, favoriteList):
-		self.favoriteList = favoriteList
+		self.favorites.set(favoriteList)
+		self.favoriteList = self.favorites.locations
+
+	def saveFavoriteList(self, favoriteList):
+		self.setFavoriteList(favoriteList)
+		self.favoritefile.write(self.favoriteList)
+
+	def getFavoriteIndex(self, location, default=0):
+		return self.favorites.indexOf(location, default)
 
 	def reduceCityname(self, weathercity):
 		components = list(dict.fromkeys(weathercity.split(', ')))  # remove duplicates from list
@@ -68,11 +92,32 @@ class WeatherHelper():
 			return (f"{components[0]}, {components[1]}, {components[-1]}")
 		return (f"{components[0]}, {components[1]}") if len_components == 2 else (f"{components[0]}")
 
+	def scanIconsets(self):  # the icon sets are only searched when the settings are opened
+		iconsets = [("", _("Default"))]
+		if exists(ICONSETROOT):
+			for iconset in listdir(ICONSETROOT):
+				if isfile(join(ICONSETROOT, iconset, "0.png")):
+					iconsets.append((iconset, iconset))
+		config.plugins.OAWeather.iconset.setChoices(iconsets, default="")
+
+	def registerFont(self):  # the font is only used by the screens of the plugin
+		if not self.fontRegistered:
+			self.fontRegistered = True
+			fontFile = resolveFilename(SCOPE_FONTS, "fallback.font")
+			if isfile(fontFile):
+				addFont(fontFile, "OAWeatherFont", 100, -1, 0)
+			elif config.plugins.OAWeather.debug.value:
+				print("[%s] OAWeatherDetailview__init__: %s" % (MODULE_NAME, fontFile))
+
+	def getIconpath(self):
+		iconset = config.plugins.OAWeather.iconset.value
+		return join(ICONSETROOT, iconset) if iconset else join(PLUGINPATH, "Icons")
+
 	def isolateCityname(self, weathercity):
 		return weathercity.split(",")[0]
 
 	def isDifferentLocation(self, geodata1, geodata2):
-		return ((geodata1[1] - geodata2[1])**2 + (geodata1[2] - geodata2[2])**2)**.5 > 0.02
+		return isDifferentLocation(geodata1, geodata2)
 
 	def convertOldLocation(self):  # deprecated: will be removed at end of 2025
 		if config.plugins.OAWeather.owm_geocode.value and config.plugins.OAWeather.weathercity.value:
@@ -88,63 +133,197 @@ class WeatherHelper():
 			config.plugins.OAWeather.weathercity.save()
 
 	def loadSkin(self, skinName=""):
-		params = {"picpath": join(PLUGINPATH, "Images")}
-		skintext = ""
-		xml = parse(join(PLUGINPATH, "skin.xml")).getroot()
-		for screen in xml.findall('screen'):
-			if screen.get("name") == skinName:
-				skintext = tostring(screen).decode()
-				for key in params.keys():
-					try:
-						skintext = skintext.replace('{%s}' % key, params[key])
-					except Exception as e:
-						print("%s@key=%s" % (str(e), key))
-				break
+		self.registerFont()
+		skinfile = join(PLUGINPATH, "skin.xml")
+		try:
+			mtime = getmtime(skinfile)
+		except OSError as err:
+			print("[%s] ERROR in module 'loadSkin': %s" % (MODULE_NAME, str(err)))
+			return ""
+		if mtime != self.skinMtime:  # parse the file only once, or again after it has been changed
+			self.skinMtime = mtime
+			self.screens = {screen.get("name"): tostring(screen).decode() for screen in parse(skinfile).getroot().findall('screen')}
+			self.skins = {}
+		skintext = self.skins.get(skinName)
+		if skintext is None:  # substitute the placeholders only on first use
+			skintext = self.screens.get(skinName, "")
+			params = {"picpath": join(PLUGINPATH, "Images")}
+			for key in params.keys():
+				try:
+					skintext = skintext.replace('{%s}' % key, params[key])
+				except Exception as e:
+					print("%s@key=%s" % (str(e), key))
+			self.skins[skinName] = skintext
 		return skintext
 
 
+class IconIndex():
+	RESCANDELAY = 60  # seconds, on a missing file the directory is scanned again at most this often
+
+	def __init__(self):
+		self.index = {}  # {directory: (scan time, {filename: fullpath})}
+
+	def getIconFile(self, path, filename):  # returns the full path or "" if the file does not exist
+		entry = self.index.get(path)
+		now = time()
+		if entry is None or (filename not in entry[1] and now - entry[0] > self.RESCANDELAY):  # e.g. storage mounted later
+			files = {name: join(path, name) for name in listdir(path)} if path and isdir(path) else {}
+			entry = (now, files)
+			self.index[path] = entry
+		return entry[1].get(filename, "")
+
+	def invalidate(self, configElement=None):
+		self.index = {}
+
+
+class PixmapPool():
+	def __init__(self, maxsize=64):
+		self.maxsize = maxsize
+		self.iconpath = None
+		self.icons = {}  # {yahoocode: pixmap} of the active icon set, decoded once
+		self.pixmaps = OrderedDict()  # {fullpath: pixmap} of all other images in LRU order
+
+	def getIcon(self, iconpath, yahoocode):
+		if iconpath != self.iconpath:
+			self.loadIconset(iconpath)
+		icon = self.icons.get(yahoocode)
+		if icon is None:  # the icon may have been added since, the index rescans only now and then
+			iconfile = iconindex.getIconFile(iconpath, f"{yahoocode}.png")
+			if iconfile:
+				icon = self.icons[yahoocode] = LoadPixmap(cached=True, path=iconfile)
+		return icon
+
+	def loadIconset(self, iconpath):  # decode day and night variants of all weather icons at once
+		self.iconpath = iconpath
+		icons = {}
+		for yahoocode in [str(code) for code in range(48)] + ["na"]:
+			iconfile = iconindex.getIconFile(iconpath, f"{yahoocode}.png")
+			if iconfile:
+				icons[yahoocode] = LoadPixmap(cached=True, path=iconfile)
+		self.icons = icons
+
+	def getPixmap(self, filename):
+		pixmap = self.pixmaps.get(filename)
+		if pixmap is None:
+			pixmap = LoadPixmap(cached=True, path=filename) if filename else None
+			if pixmap is not None:
+				self.pixmaps[filename] = pixmap
+				if len(self.pixmaps) > self.maxsize:
+					self.pixmaps.popitem(last=False)  # drop the least recently used
+		else:
+			self.pixmaps.move_to_end(filename)
+		return pixmap
+
+	def invalidate(self, configElement=None):
+		self.iconpath = None
+		self.icons = {}
+		self.pixmaps.clear()
+
+
+def normalizeSafely(service, fulldata, convert2icon, location):  # a faulty payload must not stop the reduced data from being published
+	try:
+		return normalize(service, fulldata, convert2icon, location)
+	except Exception as err:
+		print("[%s] error in normalizing the data of '%s': %s" % (MODULE_NAME, location[0] if location else "", str(err)))
+		print_exc()
+		return None
+
+
+def newWeatherinfo(mode, apikey):  # Tools.Weatherinfo is only imported when it is needed for the first time
+	from Tools.Weatherinfo import Weatherinfo
+	return Weatherinfo(mode, apikey)
+
+
+class Dispatcher():  # runs work in the thread pool and hands the results over to the main loop, where all GUI updates must happen
+	def __init__(self):
+		self.lock = Lock()
+		self.jobs = {}  # {key: newest waiting (work, done) or None}, at most one job per key is running
+		self.results = []  # [(function, args), ...] waiting for the main loop
+
+	def submit(self, key, work, done=None):  # a job submitted while another one of the same key is running supersedes all waiting ones
+		with self.lock:
+			if key in self.jobs:
+				self.jobs[key] = (work, done)
+				return
+			self.jobs[key] = None
+		callInThread(self.execute, key, work, done)
+
+	def execute(self, key, work, done):
+		try:
+			result = work()
+		except Exception as err:
+			print("[%s] error in dispatched job '%s': %s" % (MODULE_NAME, key, str(err)))
+			print_exc()
+			result, done = None, None
+		with self.lock:
+			waiting = self.jobs.pop(key)
+			if waiting:
+				self.jobs[key] = None
+		if waiting:  # the result is already outdated, run the newest job instead
+			callInThread(self.execute, key, *waiting)
+		elif done:
+			self.callInMainLoop(done, result)
+
+	def callInMainLoop(self, function, *args):  # everything arriving until the main loop runs is handled in one go
+		with self.lock:
+			self.results.append((function, args))
+			schedule = len(self.results) == 1
+		if schedule:
+			callFromThread(self.flush)
+
+	def flush(self):
+		with self.lock:
+			results, self.results = self.results, []
+		for function, args in results:
+			try:  # one failing callback must not drop the others of the batch
+				function(*args)
+			except Exception as err:
+				print("[%s] error in main loop callback: %s" % (MODULE_NAME, str(err)))
+				print_exc()
+
+
 weatherhelper = WeatherHelper()
+iconindex = IconIndex()
+pixmappool = PixmapPool()
+dispatcher = Dispatcher()
+profile("helpers")
 
 
 config.plugins.OAWeather = ConfigSubsection()
-ICONSETS = [("", _("Default"))]
 ICONSETROOT = join(resolveFilename(SCOPE_SKINS), "WeatherIconSets")
-if exists(ICONSETROOT):
-	for iconset in listdir(ICONSETROOT):
-		if isfile(join(ICONSETROOT, iconset, "0.png")):
-			ICONSETS.append((iconset, iconset))
 config.plugins.OAWeather.enabled = ConfigYesNo(default=True)
-config.plugins.OAWeather.iconset = ConfigSelection(default="", choices=ICONSETS)
+config.plugins.OAWeather.iconset = ConfigSelection(default="", choices=[("", _("Default"))])  # all icon sets are offered by weatherhelper.scanIconsets()
+iconset = config.plugins.OAWeather.iconset.saved_value
+if iconset and isfile(join(ICONSETROOT, iconset, "0.png")):  # until then only the selected one has to be valid
+	config.plugins.OAWeather.iconset.setChoices([("", _("Default")), (iconset, iconset)], default="")
+	config.plugins.OAWeather.iconset.load()
+profile("icon sets")
 config.plugins.OAWeather.nighticons = ConfigYesNo(default=True)
-config.plugins.OAWeather.cachedata = ConfigSelection(default=0, choices=[(0, _("Disabled"))] + [(x, _("%d Minutes") % x) for x in (30, 60, 120)])
+config.plugins.OAWeather.cachedata = ConfigSelection(default=60, choices=[(0, _("Disabled"))] + [(x, _("%d Minutes") % x) for x in (30, 60, 120)])
 config.plugins.OAWeather.refreshInterval = ConfigSelectionNumber(0, 1440, 30, default=120, wraparound=True)
 config.plugins.OAWeather.apikey = ConfigText(default="", fixed_size=False)
 config.plugins.OAWeather.weathercity = ConfigText(default="", visible_width=250, fixed_size=False)  # deprecated: will be removed at end of 2025
 config.plugins.OAWeather.owm_geocode = ConfigText(default=(0, 0))  # deprecated: will be removed at end of 2025
-weatherhelper.readFavoriteList()
+weatherhelper.readFavoriteList()  # needed now: the saved location is only accepted if it is one of the choices
 choiceList = [(item, item[0]) for item in weatherhelper.favoriteList]
 config.plugins.OAWeather.weatherlocation = ConfigSelection(default=weatherhelper.locationDefault, choices=choiceList)
 weatherhelper.convertOldLocation()  # deprecated: will be removed at end of 2025
+profile("favorites")
 config.plugins.OAWeather.detailLevel = ConfigSelection(default="default", choices=[("default", _("More Details / Smaller font")), ("reduced", _("Less details / Larger font"))])
 config.plugins.OAWeather.tempUnit = ConfigSelection(default="Celsius", choices=[("Celsius", _("Celsius")), ("Fahrenheit", _("Fahrenheit"))])
 config.plugins.OAWeather.windspeedMetricUnit = ConfigSelection(default="km/h", choices=[("km/h", _("km/h")), ("m/s", _("m/s"))])
 config.plugins.OAWeather.trendarrows = ConfigSelection(default=1, choices=[(0, _("Disabled")), (1, "▲▼"), (2, "∆∇"), (3, "↑↓"), (4, "↥↧"), (5, "⇧⇩"), (6, "⇑⇓"), (7, "∧∨"), (8, "<>"), (9, "+-")])
 config.plugins.OAWeather.weatherservice = ConfigSelection(default="MSN", choices=[("MSN", _("MSN weather")), ("OpenMeteo", _("Open-Meteo Wetter")), ("OpenWeather", _("OpenWeatherMap"))])
+config.plugins.OAWeather.prefetch = ConfigYesNo(default=False)
 config.plugins.OAWeather.debug = ConfigYesNo(default=False)
-
-MODULE_NAME = "OAWeather"
-CACHEFILE = resolveFilename(SCOPE_CONFIG, "OAWeather.dat")
-PLUGINPATH = join(resolveFilename(SCOPE_PLUGINS), 'Extensions/OAWeather')
-
-fontFile = resolveFilename(SCOPE_FONTS, "fallback.font")
-if isfile(fontFile):
-	addFont(fontFile, "OAWeatherFont", 100, -1, 0)
-elif config.plugins.OAWeather.debug.value:
-	print("[%s] OAWeatherDetailview__init__: %s" % (MODULE_NAME, fontFile))
+config.plugins.OAWeather.iconset.addNotifier(iconindex.invalidate, initial_call=False)
+config.plugins.OAWeather.iconset.addNotifier(pixmappool.invalidate, initial_call=False)
+profile("config")
 
 
 class WeatherSettingsView(Setup):
 	def __init__(self, session):
+		weatherhelper.scanIconsets()
 		Setup.__init__(self, session, "WeatherSettings", plugin="Extensions/OAWeather", PluginLanguageDomain="OAWeather")
 		self["key_blue"] = StaticText(_("Manage favorites"))
 		self["key_yellow"] = StaticText(_("Defaults"))
@@ -177,8 +356,6 @@ class WeatherSettingsView(Setup):
 		if self.old_weatherlocation != config.plugins.OAWeather.weatherlocation.value:
 			config.plugins.OAWeather.weatherlocation.save()
 			weatherhandler.reset(newLocation=config.plugins.OAWeather.weatherlocation.value)
-		if config.plugins.OAWeather.trendarrows.isChanged():
-			self.session.screen["OAWeather"].changed((1,))  # (1,) = refresh all source widgets
 		Setup.keySave(self)
 
 	def keyYellow(self, SAVE=False):
@@ -198,37 +375,278 @@ class WeatherSettingsView(Setup):
 			configItem.save()
 
 
+class WeatherCache():
+	VERSION = 1  # increase on incompatible changes of the cache file format
+	FRESH = 0  # within TTL: serve it, no fetch needed
+	STALE = 1  # TTL expired but within the stale window: serve it while a refresh is running
+	STALEWINDOW = 3600  # seconds, if the cache file is disabled
+
+	MAXENTRIES = 20  # at least, see WeatherHandler.setCacheSize()
+
+	def __init__(self, cachefile, maxEntries=MAXENTRIES, saveDelay=300):
+		self.cachefile = cachefile
+		self.maxEntries = maxEntries
+		self.saveDelay = saveDelay  # seconds to collect changes before they are written to flash
+		self.entries = {}  # {(service, units, (city, lon, lat)): {"data": {...}, "fulldata": {...}, "time": float, "model": WeatherModel or None, "fingerprint": {...}, "expires": float or None}}
+		self.dirty = False
+		self.writeLock = Lock()
+		self.saveTimer = eTimer()
+		self.saveTimer.callback.append(self.flush)
+		self.started = time()
+
+	def getKey(self, service, units, location):
+		return (service, units, tuple(location))
+
+	def put(self, key, data, fulldata, fetchtime=None, model=None, fingerprint=None, expires=None):
+		self.entries[key] = {"data": data, "fulldata": fulldata, "time": fetchtime or time(), "model": model, "fingerprint": fingerprint or {}, "expires": expires}  # the model is not saved, it is rebuilt on demand
+
+	def getExpiry(self, entry, ttl):  # end of the TTL as epoch seconds, None if the entry doesn't expire
+		if entry.get("expires"):  # the time of the next refresh scheduled for this entry
+			return entry["expires"]
+		if ttl:
+			return entry["time"] + ttl
+		return None if entry["time"] >= self.started else entry["time"]  # ttl = 0 means 'once': fetched once per start
+
+	def hasDetails(self, entry):  # prefetched entries keep no provider payload, after a restart they lack the model as well
+		return bool(entry["fulldata"]) or entry.get("model") is not None
+
+	def get(self, key, ttl, stalewindow):
+		entry = self.entries.get(key)
+		if entry:
+			expiry = self.getExpiry(entry, ttl)
+			now = time()
+			if expiry is None or now < expiry:
+				return entry, self.FRESH
+			if now < expiry + stalewindow:
+				return entry, self.STALE
+		return None, None
+
+	def evict(self, ttl, stalewindow):  # drop the entries get() wouldn't return anymore, then the oldest ones exceeding maxEntries
+		now = time()
+		entries = {}
+		for key, entry in self.entries.items():
+			expiry = self.getExpiry(entry, ttl)
+			if expiry is None or now < expiry + stalewindow:
+				entries[key] = entry
+		self.entries = entries
+		if len(self.entries) > self.maxEntries:
+			newest = sorted(self.entries.items(), key=lambda item: item[1]["time"], reverse=True)[:self.maxEntries]
+			self.entries = dict(newest)
+
+	def load(self):
+		if isfile(self.cachefile):
+			try:
+				with gzip_open(self.cachefile, "rt", encoding="utf-8") as fd:
+					content = json_load(fd)
+				if content.get("version") == self.VERSION:  # ignore cache files of other versions
+					for item in content.get("entries", []):
+						data = item["data"]
+						if "forecast" in data:  # JSON only knows string keys, the forecast days are integers
+							data["forecast"] = {int(day): value for day, value in data["forecast"].items()}
+						self.entries[self.getKey(item["service"], item["units"], item["location"])] = {"data": data, "fulldata": item["fulldata"], "time": item["time"], "model": None, "fingerprint": item.get("fingerprint", {}), "expires": item.get("expires")}
+			except Exception as err:
+				print("[%s] error in reading cache file: %s" % (MODULE_NAME, str(err)))
+
+	def save(self):  # write-behind: coalesce all changes until the timer expires or the session ends
+		self.dirty = True
+		if not self.saveTimer.isActive():
+			self.saveTimer.start(self.saveDelay * 1000, True)
+
+	def flush(self, background=True):  # at shutdown the file is written synchronously, the reactor stops right after
+		self.saveTimer.stop()
+		if self.dirty:
+			self.dirty = False
+			entries = [{"service": key[0], "units": key[1], "location": key[2], "time": entry["time"], "data": entry["data"], "fulldata": entry["fulldata"], "fingerprint": entry["fingerprint"], "expires": entry.get("expires")} for key, entry in self.entries.items()]  # snapshot on the main loop
+			if background:
+				callInThread(self.write, entries)
+			else:
+				self.write(entries)
+
+	def write(self, entries):  # encoding, compressing and syncing to flash takes a while, so this usually runs in a thread
+		with self.writeLock:  # one write at a time, they share the temporary file
+			tmpfile = "%s.tmp" % self.cachefile
+			try:
+				with gzip_open(tmpfile, "wt", compresslevel=1, encoding="utf-8") as fd:  # fast, the size hardly matters
+					json_dump({"version": self.VERSION, "entries": entries}, fd, separators=(",", ":"), default=str)
+				with open(tmpfile, "rb") as fd:
+					fsync(fd.fileno())
+				replace(tmpfile, self.cachefile)  # atomic, so a power cut can't leave a truncated cache file
+			except Exception as err:
+				print("[%s] error in writing cache file: %s" % (MODULE_NAME, str(err)))
+
+
+class RefreshScheduler():  # decides when the next request to the weather service is due
+	PROVIDERS = {  # minInterval: shortest regular refresh, cadence: how often the service updates its data, rate: (max. requests, per seconds)
+		"MSN": {"minInterval": 600, "cadence": 900, "rate": (10, 60)},
+		"OpenMeteo": {"minInterval": 900, "cadence": 3600, "rate": (10, 60)},
+		"OpenWeather": {"minInterval": 600, "cadence": 600, "rate": (10, 60)}
+	}
+	BACKOFFBASE = 10  # seconds after the first error, doubled with each further error
+	BACKOFFMAX = 3600
+	CADENCEMARGIN = 60  # seconds the service needs to publish its new data
+
+	def __init__(self):
+		self.failures = 0
+		self.requests = {}  # {service: [request times within the rate window]}
+
+	def getProvider(self, service):
+		return self.PROVIDERS.get(service, self.PROVIDERS["MSN"])
+
+	def getStartupDelay(self, hasData):  # spread the first requests of all boxes started at the same time
+		return uniform(5, 60) if hasData else uniform(1, 5)  # without data only a short delay, the screens are empty until then
+
+	def getRetryDelay(self):  # exponential backoff with jitter, reset by success()
+		self.failures += 1
+		delay = min(self.BACKOFFBASE * 2 ** (self.failures - 1), self.BACKOFFMAX)
+		return uniform(delay / 2, delay)
+
+	def success(self):
+		self.failures = 0
+
+	def getObservationTime(self, service, fulldata):  # time of the current conditions as epoch seconds, None if unknown
+		try:
+			if service == "MSN":
+				created = fulldata["responses"][0]["weather"][0]["current"]["created"]
+				return datetime.fromisoformat(created).timestamp()
+			if service == "OpenWeather":
+				return fulldata.get("dt") or None
+		except (KeyError, IndexError, TypeError, ValueError):
+			pass
+		return None
+
+	def getNextRefresh(self, service, interval, observed=None):  # seconds until the next regular refresh, None if there is none
+		if not interval:  # 'once'
+			return None
+		provider = self.getProvider(service)
+		now = time()
+		delay = max(interval, provider["minInterval"])
+		if observed:  # refresh just after the service has published its next data update
+			cadence = provider["cadence"]
+			delay = observed + ceil((now + delay - observed) / cadence) * cadence + self.CADENCEMARGIN - now
+		return delay + uniform(0, delay * 0.05)
+
+	def acquire(self, service):  # returns 0 if a request may be sent now, otherwise the seconds to wait
+		count, window = self.getProvider(service)["rate"]
+		now = time()
+		requests = [requestTime for requestTime in self.requests.get(service, []) if now - requestTime < window]
+		self.requests[service] = requests
+		if len(requests) >= count:
+			return requests[0] + window - now
+		requests.append(now)
+		return 0
+
+
+class FavoritePrefetcher():  # refreshes the cache entries of the favorites in the background
+	WORKERS = 2  # max. parallel requests
+
+	def __init__(self, handler):
+		self.handler = handler
+		self.lock = Lock()  # the callbacks of Weatherinfo arrive in its fetch threads
+		self.queue = []
+		self.idle = []  # [(mode, Weatherinfo), ...] of finished workers, reused by the next round
+		self.busy = 0
+		config.plugins.OAWeather.weatherservice.addNotifier(self.clear, initial_call=False)
+
+	def start(self, locations):  # a new round replaces the locations not yet fetched
+		with self.lock:
+			self.queue = list(locations)
+			count = min(self.WORKERS - self.busy, len(self.queue))
+			self.busy += count
+		for worker in range(count):
+			self.fetchNext(self.getWorker())
+
+	def clear(self, configElement=None):  # on a change of the service: running requests finish, but their workers are not reused
+		with self.lock:
+			self.queue = []
+			self.idle = []
+
+	def getWorker(self):
+		mode = self.handler.getMode()
+		with self.lock:
+			while self.idle:
+				worker = self.idle.pop()
+				if worker[0] == mode:  # workers of another service are dropped
+					return worker
+		return mode, newWeatherinfo(mode, config.plugins.OAWeather.apikey.value)  # the mode is the one the worker was created with
+
+	def fetchNext(self, worker):
+		mode, weatherinfo = worker
+		service = config.plugins.OAWeather.weatherservice.value
+		with self.lock:
+			location = None
+			if mode == self.handler.getMode() and self.queue and not self.handler.scheduler.acquire(service):  # a rate limited round continues on the next refresh
+				location = self.queue.pop(0)
+			if location is None:
+				self.busy -= 1
+				if mode == self.handler.getMode():
+					self.idle.append(worker)
+				return
+		language = config.osd.language.value.replace("_", "-")
+		key = self.handler.getCacheKey(location)  # the settings at the start of the request
+		weatherinfo.start(geodata=location, units=key[1], scheme=language, reduced=True, callback=lambda data, error: self.fetchCallback(worker, key, data, error))
+
+	def fetchCallback(self, worker, key, data, error):
+		if error or data is None:
+			self.handler.debug("prefetch of '%s' failed: %s" % (key[2][0], error))
+		else:
+			self.handler.putCacheEntry(key, data, worker[1])
+		self.fetchNext(worker)
+
+
 class WeatherHandler():
 	def __init__(self):
 		self.session = None
 		self.enabledebug = config.plugins.OAWeather.debug.value
-		mode = {"MSN": "msn", "OpenMeteo": "omw", "OpenWeather": "owm"}.get(config.plugins.OAWeather.weatherservice.value, "msn")
-		self.WI = Weatherinfo(mode, config.plugins.OAWeather.apikey.value)
+		self.weatherinfo = None  # see WI
 		self.currCity = ""
 		self.currLocation = config.plugins.OAWeather.weatherlocation.value
-		self.trialcounter = 0
+		self.scheduler = RefreshScheduler()
 		self.currentWeatherDictValid = 3  # 0= green (data available), 1= yellow (still working), 2= red (no data available, wait on next refresh) 3=startup
 		self.refreshTimer = eTimer()
 		self.refreshTimer.callback.append(self.refreshWeatherData)
 		self.weatherDict = {}
 		self.fullWeatherDict = {}
+		self.fullWeatherTime = 0  # fetch time of fullWeatherDict
+		self.weatherModel = None  # normalized hourly/daily data of fullWeatherDict, see requestModel()
+		self.currentEntry = None  # cache entry of fullWeatherDict
+		self.fingerprint = {}  # section digests of the published data, see normalizer.fingerprint()
+		self.cache = WeatherCache(CACHEFILE)
+		self.setCacheSize()
+		self.prefetcher = FavoritePrefetcher(self)
 		self.onUpdate = []
 		self.refreshCallback = None
+		self.generation = 0
+		self.fetchToken = None  # (generation, service, location, units, language) of the running request
 		self.skydirs = {"N": _("North"), "NE": _("Northeast"), "E": _("East"), "SE": _("Southeast"), "S": _("South"), "SW": _("Southwest"), "W": _("West"), "NW": _("Northwest")}
 
+	@property
+	def WI(self):  # created on first use, so the plugin start doesn't have to wait for it
+		if self.weatherinfo is None:
+			self.weatherinfo = newWeatherinfo(self.getMode(), config.plugins.OAWeather.apikey.value)
+			if self.weatherinfo.error:
+				self.weatherinfo.setmode()  # fallback to MSN
+		return self.weatherinfo
+
 	def sessionStart(self, session):
 		self.session = session
 		self.debug("sessionStart")
-		self.getCacheData()
+		self.startupTimer = eTimer()  # read the cache after the boot has been finished, the first request is delayed anyway
+		self.startupTimer.callback.append(self.getCacheData)
+		self.startupTimer.start(0, True)
 
-	def writeData(self, data):
+	def writeData(self, data, sections=None):  # sections = names of the changed sections, None = all
 		self.debug("writeData")
 		self.currentWeatherDictValid = 0
 		self.weatherDict = data
 		for callback in self.onUpdate:
-			callback(data)
-		seconds = int(config.plugins.OAWeather.refreshInterval.value * 60)
-		self.refreshTimer.start(seconds * 1000, True)
+			callback(data, sections)
+
+	def startRefreshTimer(self, seconds):  # None = no further refresh
+		if seconds is None:
+			self.refreshTimer.stop()
+		else:
+			self.debug("next refresh in %d secs" % seconds)
+			self.refreshTimer.start(max(int(seconds * 1000), 1000), True)
 
 	def getData(self):
 		return self.weatherDict
@@ -236,26 +654,119 @@ class WeatherHandler():
 	def getFulldata(self):
 		return self.fullWeatherDict
 
+	def hasDetails(self):  # the detail view needs the payload or its model
+		return bool(self.fullWeatherDict) or self.weatherModel is not None
+
+	def requestModel(self, key, callback):  # built once per payload, cached entries are normalized in a worker thread when they are used first
+		entry = self.currentEntry
+		if entry is None or entry.get("model") is not None or not entry["fulldata"]:
+			callback(self.weatherModel)
+			return
+		args = (config.plugins.OAWeather.weatherservice.value, entry["fulldata"], self.WI.convert2icon, self.currLocation)  # taken now, the worker must not read the handler
+		dispatcher.submit(key, lambda: normalizeSafely(*args), lambda model: self.modelReady(entry, model, callback))
+
+	def modelReady(self, entry, model, callback):  # runs in the main loop
+		if entry.get("model") is None:
+			entry["model"] = model
+		if entry is self.currentEntry:  # otherwise the location has been switched meanwhile, which updates the listeners anyway
+			self.weatherModel = entry["model"]
+			callback(self.weatherModel)
+
+	def useCacheEntry(self, entry):
+		self.fullWeatherDict, self.fullWeatherTime = entry["fulldata"] or {}, entry["time"]
+		self.weatherModel = entry.get("model")
+		self.currentEntry = entry
+		self.fingerprint = entry["fingerprint"]
+
+	def getDataAge(self):  # age of the current provider payload in seconds, None if there is none
+		return int(time() - self.fullWeatherTime) if self.fullWeatherTime else None
+
 	def getValid(self) -> int:
 		return self.currentWeatherDictValid
 
 	def getSkydirs(self) -> dict:
 		return self.skydirs
 
-	def getCacheData(self):
-		cacheminutes = config.plugins.OAWeather.cachedata.value
-		if cacheminutes and isfile(CACHEFILE):
-			timedelta = (time() - getmtime(CACHEFILE)) / 60
-			if cacheminutes > timedelta:
-				with open(CACHEFILE, "rb") as fd:
-					cache_data = load(fd)
-				self.writeData(cache_data)
+	def getCacheTTL(self):
+		return int(config.plugins.OAWeather.refreshInterval.value * 60)
+
+	def getCacheStaleWindow(self):  # the cache file setting also extends the time outdated data is served
+		return int(config.plugins.OAWeather.cachedata.value * 60) or WeatherCache.STALEWINDOW
+
+	def getCacheKey(self, location=None):
+		return self.cache.getKey(config.plugins.OAWeather.weatherservice.value, self.getUnits(), location or self.currLocation)
+
+	def setCacheSize(self):  # the cache must hold all favorites, otherwise the prefetch evicts its own results
+		self.cache.maxEntries = max(WeatherCache.MAXENTRIES, len(weatherhelper.favoriteList) + 1)
+
+	def getCachedLocation(self, location=None):
+		return self.cache.get(self.getCacheKey(location), self.getCacheTTL(), self.getCacheStaleWindow())
+
+	def isDataFresh(self, location=None):
+		return self.getCachedLocation(location)[1] == WeatherCache.FRESH
+
+	def getCacheData(self):  # a cache file is read even if writing it is disabled meanwhile, the stale window limits its use
+		self.cache.load()
+		self.cache.evict(self.getCacheTTL(), self.getCacheStaleWindow())
+		entry, state = self.getCachedLocation()
+		if entry:  # serve last-known data immediately, even if it is stale
+			self.debug("getCacheData: use cached data (%s)" % ("fresh" if state == WeatherCache.FRESH else "stale"))
+			self.useCacheEntry(entry)
+			self.writeData(entry["data"])
+			if state == WeatherCache.FRESH and self.cache.hasDetails(entry):
+				expiry = self.cache.getExpiry(entry, self.getCacheTTL())
+				self.startRefreshTimer(expiry - time() if expiry else None)
 				return
-		self.refreshTimer.start(5000, True)
+			self.startRefreshTimer(self.scheduler.getStartupDelay(True))
+			return
+		self.startRefreshTimer(self.scheduler.getStartupDelay(False))
 
 	def getCurrLocation(self):
 		return self.currLocation
 
+	def getMode(self):
+		return {"MSN": "msn", "OpenMeteo": "omw", "OpenWeather": "owm"}.get(config.plugins.OAWeather.weatherservice.value, "msn")
+
+	def putCacheEntry(self, key, data, weatherinfo):  # data of another location, fetched by the prefetcher
+		fulldata = weatherinfo.info
+		model = normalizeSafely(key[0], fulldata, weatherinfo.convert2icon, key[2])  # still in the fetch thread
+		dispatcher.callInMainLoop(self.storeCacheEntry, key, data, time(), model, fingerprint(data, model))
+
+	def storeCacheEntry(self, key, data, fetchtime, model, newFingerprint):
+		if key[:2] != (config.plugins.OAWeather.weatherservice.value, self.getUnits()):  # service or units changed meanwhile
+			return
+		self.cache.put(key, data, None, fetchtime, model, newFingerprint)  # the model is enough, full payloads of all favorites would fill memory and flash
+		if config.plugins.OAWeather.cachedata.value:
+			self.cache.save()
+
+	def prefetchFavorites(self):  # fetch all favorites without fresh data, so switching to them needs no waiting
+		self.setCacheSize()
+		locations = [location for location in weatherhelper.favoriteList if weatherhelper.isDifferentLocation(location, self.currLocation) and not self.isDataFresh(location)]
+		if locations:
+			self.debug("prefetchFavorites: %s" % [location[0] for location in locations])
+			self.prefetcher.start(locations)
+
+	def getUnits(self):
+		return "imperial" if config.plugins.OAWeather.tempUnit.value == "Fahrenheit" else "metric"
+
+	def switchLocation(self, newLocation, callback=None):
+		entry, state = self.getCachedLocation(newLocation)
+		if entry:
+			self.debug("switchLocation: use cached data for '%s' (%s)" % (newLocation[0], "fresh" if state == WeatherCache.FRESH else "stale"))
+			self.refreshTimer.stop()
+			self.abortFetch()  # a request for the previous location must not overwrite the cached data
+			self.currLocation = newLocation
+			self.currCity = weatherhelper.isolateCityname(newLocation[0])
+			self.useCacheEntry(entry)
+			self.writeData(entry["data"])
+			if callback:
+				callback()
+			if state == WeatherCache.FRESH and self.cache.hasDetails(entry):  # refresh when the cached data expires, not a full interval from now
+				expiry = self.cache.getExpiry(entry, self.getCacheTTL())
+				self.startRefreshTimer(expiry - time() if expiry else None)
+				return
+		self.reset(newLocation, callback)  # no data, stale data or no details: revalidate in background
+
 	def setCurrLocation(self, currLocation):
 		self.currLocation = currLocation
 
@@ -267,58 +778,110 @@ class WeatherHandler():
 			self.refreshTimer.start(600000, True)
 			return
 		if config.plugins.OAWeather.enabled.value:
+			wait = self.scheduler.acquire(config.plugins.OAWeather.weatherservice.value)
+			if wait:  # too many requests to this service in a short time
+				self.debug("rate limit reached, wait %d secs" % wait)
+				self.startRefreshTimer(wait)
+				return
 			self.currCity = weatherhelper.isolateCityname(self.currLocation[0])
-			language = config.osd.language.value.replace("_", "-")
-			unit = "imperial" if config.plugins.OAWeather.tempUnit.value == "Fahrenheit" else "metric"
 			if self.currLocation:
-				self.WI.start(geodata=self.currLocation, units=unit, scheme=language, reduced=True, callback=self.refreshWeatherDataCallback)
+				self.abortFetch()
+				self.generation += 1
+				token = (self.generation,) + self.getFetchKey()
+				self.fetchToken = token
+				weatherinfo = self.WI  # the callback keeps this instance, even if a newer request replaces self.WI
+				weatherinfo.start(geodata=self.currLocation, units=token[3], scheme=token[4], reduced=True, callback=lambda data, error: self.refreshWeatherDataCallback(data, error, weatherinfo, token))
 			else:
 				print("[%s] error in OAWeather config" % (MODULE_NAME))
 				self.currentWeatherDictValid = 2
 
-	def refreshWeatherDataCallback(self, data, error):
+	def getFetchKey(self):  # everything the result of a request depends on
+		return (config.plugins.OAWeather.weatherservice.value, tuple(self.currLocation), self.getUnits(), config.osd.language.value.replace("_", "-"))
+
+	def isCurrentFetch(self, token):
+		return token == self.fetchToken and token[1:] == self.getFetchKey()
+
+	def abortFetch(self):  # Weatherinfo can't cancel a request: its result is discarded and its instance is not used again
+		if self.fetchToken:
+			self.debug("abortFetch: discard request for '%s'" % self.fetchToken[2][0])
+			self.fetchToken = None
+			self.weatherinfo = None  # the next request gets a new instance
+
+	def refreshWeatherDataCallback(self, data, error, weatherinfo, token):  # runs in the fetch thread: only the parsing is done here
 		self.debug("refreshWeatherDataCallback")
+		if token != self.fetchToken:  # superseded by a newer request
+			self.debug("refreshWeatherDataCallback: discard outdated data for '%s'" % token[2][0])
+			return
 		if error or data is None:
-			self.trialcounter += 1
-			if self.trialcounter < 2:
-				print("[%s] lookup for city '%s' paused, try again in 10 secs..." % (MODULE_NAME, self.currCity))
-				self.currentWeatherDictValid = 1
-				self.refreshTimer.start(10000, True)
-			elif self.trialcounter > 5:
-				print("[%s] lookup for city '%s' paused 1 h, to many errors..." % (MODULE_NAME, self.currCity))
-				self.currentWeatherDictValid = 2
-				self.refreshTimer.start(3600000, True)
-			else:
-				print("[%s] lookup for city '%s' paused 5 mins, to many errors..." % (MODULE_NAME, self.currCity))
-				self.currentWeatherDictValid = 2
-				self.refreshTimer.start(300000, True)
+			dispatcher.callInMainLoop(self.refreshFailed, token)
+			return
+		fulldata = weatherinfo.info
+		model = normalizeSafely(token[1], fulldata, weatherinfo.convert2icon, token[2])  # once per fetch
+		dispatcher.callInMainLoop(self.publishData, token, data, fulldata, model, fingerprint(data, model))
+
+	def refreshFailed(self, token):
+		if not self.isCurrentFetch(token):
+			if token == self.fetchToken:  # the settings have changed meanwhile: fetch again with the current ones
+				self.fetchToken = None
+				self.refreshWeatherData()
 			return
-		self.writeData(data)
-		self.fullWeatherDict = self.WI.info
-		# TODO write cache only on close
-		if config.plugins.OAWeather.cachedata.value and self.currLocation == config.plugins.OAWeather.weatherlocation.value:
-			with open(CACHEFILE, "wb") as fd:
-				dump(data, fd, protocol=5)  # Force version 5 to be compatible with python < 3.13
+		self.fetchToken = None
+		delay = self.scheduler.getRetryDelay()
+		print("[%s] lookup for city '%s' paused, try again in %d secs..." % (MODULE_NAME, self.currCity, delay))
+		self.currentWeatherDictValid = 1 if self.scheduler.failures < 2 else 2
+		self.startRefreshTimer(delay)
+
+	def publishData(self, token, data, fulldata, model, newFingerprint):  # runs in the main loop
+		if not self.isCurrentFetch(token):  # superseded, or the settings have changed meanwhile
+			self.debug("publishData: discard outdated data for '%s'" % token[2][0])
+			if token == self.fetchToken:  # nothing newer is running: fetch again with the current settings
+				self.fetchToken = None
+				self.refreshWeatherData()
+			return
+		self.fetchToken = None
+		self.scheduler.success()
+		service = config.plugins.OAWeather.weatherservice.value
+		sections = changedSections(self.fingerprint, newFingerprint)
+		delay = self.scheduler.getNextRefresh(service, self.getCacheTTL(), self.scheduler.getObservationTime(service, fulldata))
+		expires = time() + delay if delay else None  # the data is fresh until the next refresh, which may be later than the TTL
+		if sections or self.currentEntry is None or not self.cache.hasDetails(self.currentEntry):
+			key = self.getCacheKey()
+			self.cache.put(key, data, fulldata, time(), model, newFingerprint, expires)
+			self.useCacheEntry(self.cache.entries[key])
+			self.cache.evict(self.getCacheTTL(), self.getCacheStaleWindow())
+			self.writeData(data, sections)
+			if config.plugins.OAWeather.cachedata.value:
+				self.cache.save()
+		else:  # same data as before: no widget updates and no cache write, the data is only fresh again
+			self.debug("refreshWeatherDataCallback: data unchanged")
+			self.currentEntry["time"] = self.fullWeatherTime = time()
+			self.currentEntry["expires"] = expires
+			self.cache.entries[self.getCacheKey()] = self.currentEntry  # in case it was evicted meanwhile
+			self.currentWeatherDictValid = 0
+		self.startRefreshTimer(delay)
+		if config.plugins.OAWeather.prefetch.value:
+			self.prefetchFavorites()
 		if self.refreshCallback:
 			self.refreshCallback()
 			self.refreshCallback = None
 
+	def revalidate(self, callback=None):  # refresh outdated data in background, but don't restart or add requests
+		self.refreshCallback = callback
+		if not self.fetchToken and not self.scheduler.failures:  # after a failure the retry timer is already running
+			self.refreshWeatherData()
+
 	def reset(self, newLocation=None, callback=None):
 		self.refreshCallback = callback
 		if newLocation:
 			self.currLocation = newLocation
 		self.refreshTimer.stop()
-		if isfile(CACHEFILE):
-			remove(CACHEFILE)
-		mode = {"MSN": "msn", "OpenMeteo": "omw", "OpenWeather": "owm"}.get(config.plugins.OAWeather.weatherservice.value, "msn")
-		self.WI.setmode(mode, config.plugins.OAWeather.apikey.value)
+		self.abortFetch()
+		self.WI.setmode(self.getMode(), config.plugins.OAWeather.apikey.value)
 		if self.WI.error:
 			print(self.WI.error)
 			self.WI.setmode()  # fallback to MSN
 		if self.session:
-			iconpath = config.plugins.OAWeather.iconset.value
-			iconpath = join(ICONSETROOT, iconpath) if iconpath else join(PLUGINPATH, "Icons")
-			self.session.screen["OAWeather"].iconpath = iconpath
+			self.session.screen["OAWeather"].iconpath = weatherhelper.getIconpath()
 		self.refreshWeatherData()
 
 	def debug(self, text: str):
@@ -334,25 +897,30 @@ def setup(session, **kwargs):
 	session.open(WeatherSettingsView)
 
 
+def autostart(reason, **kwargs):
+	if reason == 1:  # shutdown
+		weatherhandler.cache.flush(background=False)
+
+
 def sessionstart(session, **kwargs):
+	sessionProfile = StartupProfile("sessionstart")
 	from Components.Sources.OAWeather import OAWeather
 	session.screen["OAWeather"] = OAWeather()
 	session.screen["OAWeather"].precipitationtext = _("Precipitation")
 	session.screen["OAWeather"].humiditytext = _("Humidity")
 	session.screen["OAWeather"].feelsliketext = _("Feels like")
 	session.screen["OAWeather"].pluginpath = PLUGINPATH
-	iconpath = config.plugins.OAWeather.iconset.value
-	if iconpath:
-		iconpath = join(ICONSETROOT, iconpath)
-	else:
-		iconpath = join(PLUGINPATH, "Icons")
-	session.screen["OAWeather"].iconpath = iconpath
+	session.screen["OAWeather"].iconpath = weatherhelper.getIconpath()
+	session.screen["OAWeather"].configChanged()  # apply the translated texts
+	sessionProfile("Source")
 	weatherhandler.sessionStart(session)
+	sessionProfile("WeatherHandler")
 
 
 def Plugins(**kwargs):
 	pluginList = []
 	pluginList.append(PluginDescriptor(name="OAWeather", where=[PluginDescriptor.WHERE_SESSIONSTART], fnc=sessionstart, needsRestart=False))
+	pluginList.append(PluginDescriptor(name="OAWeather", where=[PluginDescriptor.WHERE_AUTOSTART], fnc=autostart, needsRestart=False))
 	pluginList.append(PluginDescriptor(name=_("Weather Plugin"), description=_("Show Weather Forecast"), icon="plugin.png", where=[PluginDescriptor.WHERE_PLUGINMENU], fnc=main))
 	return pluginList
 
@@ -363,10 +931,7 @@ class OAWeatherOverview(Screen):
 		self.skin = weatherhelper.loadSkin("OAWeatherOverview")
 		Screen.__init__(self, session)
 		weatherLocation = config.plugins.OAWeather.weatherlocation.value
-		if weatherLocation != weatherhandler.getCurrLocation():
-			weatherhandler.setCurrLocation(weatherLocation)
-			weatherhandler.refreshWeatherData()
-		self.currFavIdx = weatherhelper.favoriteList.index(weatherLocation) if weatherLocation in weatherhelper.favoriteList else 0
+		self.currFavIdx = weatherhelper.getFavoriteIndex(weatherLocation)
 		self.data = {}
 		self.na = _("n/a")
 		self.title = _("Weather Plugin Overview")
@@ -395,6 +960,8 @@ class OAWeatherOverview(Screen):
 													}, -1)
 		for idx in range(1, 6):
 			self[f"weekday{idx}_temp"] = StaticText()
+		if weatherLocation != weatherhandler.getCurrLocation():  # cached data is shown at once, a request only runs if there is none or it is stale
+			weatherhandler.switchLocation(weatherLocation, self.configFinished)
 		self.onLayoutFinish.append(self.startRun)
 
 	def startRun(self):
@@ -429,18 +996,18 @@ class OAWeatherOverview(Screen):
 			self[f"weekday{day}_temp"].text = "%s %s|%s %s\n%s" % (highTemp, tempunit, lowTemp, tempunit, text)
 
 	def keyOk(self):
-		if weatherhelper.favoriteList and weatherhandler.WI.getDataReady():
+		if weatherhelper.favoriteList and weatherhandler.hasDetails():  # also true for cached data on cold start
 			self.session.open(OAWeatherDetailview, weatherhelper.favoriteList[self.currFavIdx])
 
 	def favoriteUp(self):
 		if weatherhelper.favoriteList:
 			self.currFavIdx = (self.currFavIdx - 1) % len(weatherhelper.favoriteList)
-			callInThread(weatherhandler.reset, weatherhelper.favoriteList[self.currFavIdx], self.configFinished)
+			weatherhandler.switchLocation(weatherhelper.favoriteList[self.currFavIdx], self.configFinished)
 
 	def favoriteDown(self):
 		if weatherhelper.favoriteList:
 			self.currFavIdx = (self.currFavIdx + 1) % len(weatherhelper.favoriteList)
-			callInThread(weatherhandler.reset, weatherhelper.favoriteList[self.currFavIdx], self.configFinished)
+			weatherhandler.switchLocation(weatherhelper.favoriteList[self.currFavIdx], self.configFinished)
 
 	def favoriteChoice(self):
 		choiceList = [(item[0], item) for item in weatherhelper.favoriteList]
@@ -448,7 +1015,8 @@ class OAWeatherOverview(Screen):
 
 	def returnFavoriteChoice(self, favorite):
 		if favorite is not None:
-			callInThread(weatherhandler.reset, favorite[1], self.configFinished)
+			self.currFavIdx = weatherhelper.getFavoriteIndex(favorite[1], self.currFavIdx)
+			weatherhandler.switchLocation(favorite[1], self.configFinished)
 
 	def config(self):
 		self.session.openWithCallback(self.configFinished, WeatherSettingsView)
@@ -487,25 +1055,56 @@ class OAWeatherDetailFrame(Screen):
 		self.hide()
 
 
+def formatValue(value, unit=""):
+	return ("%d %s" % (value, unit) if unit else "%d" % value) if isValue(value) else ""
+
+
+class LazyDayList():  # rows of the weather model per day, each row is formatted when it is first needed
+	def __init__(self, days, formatRow, timeOf):
+		self.days = days  # [range of column indices, ...] per day
+		self.formatRow = formatRow  # formatRow(day, index) returns the list of row fields
+		self.timeOf = timeOf  # timeOf(day, index) returns 'HH:MM' without formatting the row
+		self.formatted = {}  # {(day, index): row fields}
+
+	def __len__(self):
+		return len(self.days)
+
+	def getDayLength(self, day):
+		return len(self.days[day])
+
+	def getRow(self, day, index):
+		row = self.formatted.get((day, index))
+		if row is None:
+			row = self.formatRow(day, self.days[day][index])
+			self.formatted[(day, index)] = row
+		return row
+
+	def getTime(self, day, index):
+		return self.timeOf(day, self.days[day][index])
+
+
 class OAWeatherDetailview(Screen):
 	YAHOOnightswitch = {
 					"3": "47", "4": "47", "11": "45", "12": "45", "13": "46", "14": "46", "15": "46", "16": "46", "28": "27",
 					"30": "29", "32": "31", "34": "33", "37": "47", "38": "47", "40": "45", "41": "46", "42": "46", "43": "46"
 					}
 	YAHOOdayswitch = {"27": "28", "29": "30", "31": "32", "33": "34", "45": "39", "46": "16", "47": "4"}
+	ROWWINDOW = 10  # rows formatted before and after the current index (one page plus prefetch)
 
 	def __init__(self, session, currlocation):
 		self.skin = weatherhelper.loadSkin("OAWeatherDetailview")
 		Screen.__init__(self, session)
 		self.detailFrame = self.session.instantiateDialog(OAWeatherDetailFrame)
 		self.detailFrameActive = False
-		self.currFavIdx = weatherhelper.favoriteList.index(currlocation) if currlocation in weatherhelper.favoriteList else 0
+		self.currFavIdx = weatherhelper.getFavoriteIndex(currlocation)
 		self.old_weatherservice = config.plugins.OAWeather.weatherservice.value
 		self.detailLevels = config.plugins.OAWeather.detailLevel.getChoices()
 		self.detailLevelIdx = config.plugins.OAWeather.detailLevel.getIndex()
 		self.currdatehour = datetime.today().replace(minute=0, second=0, microsecond=0)
 		self.currdaydelta = 0
 		self.skinList = []
+		self.placeholder = tuple([""] * 13 + [None] * 11)  # row not formatted yet
+		self.iconpix = []
 		self.dayList = []
 		self.sunList = []
 		self.moonList = []
@@ -572,7 +1171,7 @@ class OAWeatherDetailview(Screen):
 		self.startRun()
 
 	def startRun(self):
-		callInThread(self.parseData)
+		self.parseData()
 
 	def updateSkinList(self):
 		weatherService = config.plugins.OAWeather.weatherservice.value
@@ -580,31 +1179,37 @@ class OAWeatherDetailview(Screen):
 		weekday = _("Today") if self.currdatehour.replace(hour=0) == todaydate else self.currdatehour.strftime("%a")
 		self["currdatetime"].setText(f"{weekday} {self.currdatehour.strftime('%d %b')}")
 		uvIndexPix = self.uvIndexPix if weatherService != "OpenWeather" else None  # OWM does not support UV-index at all
-		iconpix = [self.pressPix, self.tempPix, self.feelPix, self.humidPix, self.precipPix, self.WindSpdPpix, self.WindDirPix, self.WindGustPix, uvIndexPix, self.visiblePix]
+		self.iconpix = [self.pressPix, self.tempPix, self.feelPix, self.humidPix, self.precipPix, self.WindSpdPpix, self.WindDirPix, self.WindGustPix, uvIndexPix, self.visiblePix]
 		if self.dayList:
-			hourData = self.dayList[self.currdaydelta]
-			skinList = []
-			for hour in hourData:  # add set of icons to each hourly-entry
-				skinList.append(tuple(hour + iconpix))
-			found, index = False, 0
+			rowcount = self.dayList.getDayLength(self.currdaydelta)
+			index = 0
 			if weatherService == "OpenMeteo":  # remain at current index
-				found, index = True, self["detailList"].index
+				index = min(self["detailList"].index or 0, rowcount - 1)
 			else:
-				currdatehourtime = self.currdatehour.time()
-				for index, hourData in enumerate(skinList):  # set index to current time
-					if datetime.strptime(hourData[0][:5], "%H:%M").time() > currdatehourtime:
-						found = True
-						index -= 1
+				currdatehourtime = self.currdatehour.strftime("%H:%M")
+				for idx in range(rowcount):  # set index to current time
+					if self.dayList.getTime(self.currdaydelta, idx) > currdatehourtime:
+						index = max(idx - 1, 0)
 						break
+			skinList = [self.placeholder] * rowcount  # rows are formatted when they come into view, see fillWindow()
 			self["detailList"].updateList(skinList)
-			self["detailList"].setIndex(index if found else 0)
+			self.skinList = skinList
+			self["detailList"].setIndex(index)
+			self.fillWindow()
 		else:
 			hourData = ["", "", "", "", "", "", "", "", "", "", "", _("No data available."), _("No data available for this period."), None]
-			skinList = [tuple(hourData + iconpix)]
+			skinList = [tuple(hourData + self.iconpix)]
 			self["detailList"].updateList(skinList)
-		self.skinList = skinList
+			self.skinList = skinList
 		self.updateDetailFrame()
 
+	def fillWindow(self):  # format the rows of the visible page and some prefetch around the current index
+		if self.dayList:
+			index = self["detailList"].index or 0
+			for idx in range(max(index - self.ROWWINDOW, 0), min(index + self.ROWWINDOW + 1, len(self.skinList))):
+				if self.skinList[idx] is self.placeholder:
+					self["detailList"].modifyEntry(idx, tuple(self.dayList.getRow(self.currdaydelta, idx) + self.iconpix))
+
 	def updateDetailFrame(self):
 		if self.detailFrameActive:
 			self.detailFrame.updateFrame(list(self["detailList"].getCurrent()))
@@ -622,8 +1227,8 @@ class OAWeatherDetailview(Screen):
 
 	def updateMoonData(self):
 		if self.moonList:
-			self["moonrise"].setText(datetime.fromisoformat(self.moonList[self.currdaydelta][0]).strftime("%H:%M"))
-			self["moonset"].setText(datetime.fromisoformat(self.moonList[self.currdaydelta][1]).strftime("%H:%M"))
+			self["moonrise"].setText(self.moonList[self.currdaydelta][0][11:16])  # local time 'YYYY-MM-DDTHH:MM'
+			self["moonset"].setText(self.moonList[self.currdaydelta][1][11:16])
 			self["moonrisepix"].show()
 			self["moonsetpix"].show()
 		else:
@@ -632,242 +1237,53 @@ class OAWeatherDetailview(Screen):
 			self["moonrisepix"].hide()
 			self["moonsetpix"].hide()
 		if self.sunList:
-			self["sunrise"].setText(datetime.fromisoformat(self.sunList[self.currdaydelta][0]).strftime("%H:%M"))
-			self["sunset"].setText(datetime.fromisoformat(self.sunList[self.currdaydelta][1]).strftime("%H:%M"))
+			self["sunrise"].setText(self.sunList[self.currdaydelta][0][11:16])
+			self["sunset"].setText(self.sunList[self.currdaydelta][1][11:16])
 		else:
 			self["sunrise"].setText("")
 			self["sunset"].setText("")
 
 	def getPixmap(self, filename):
-		iconfile = join(PLUGINPATH, f"Images/{filename}")
-		return LoadPixmap(cached=True, path=iconfile) if exists(iconfile) else None
-
-	def parseData(self):
-		weatherservice = config.plugins.OAWeather.weatherservice.value
-		if weatherservice in ["MSN", "OpenMeteo", "OpenWeather"]:
-			parser = {"MSN": self.msnparser, "OpenMeteo": self.omwparser, "OpenWeather": self.owmparser}
-			parser[weatherservice]()
-			self.updateSkinList()
-			self.updateMoonData()
-
-	def msnparser(self):
-		iconpath = config.plugins.OAWeather.iconset.value
-		iconpath = join(ICONSETROOT, iconpath) if iconpath else join(PLUGINPATH, "Icons")
-		dayList = []
-		responses = weatherhandler.getFulldata().get("responses")
-		if responses:  # collect latest available data
-			weather = responses[0]["weather"][0]
-			current = weather["current"]
-			today = weather["forecast"]["days"][0]
-			sunrisestr = today["almanac"].get("sunrise", "")
-			sunrisestr = datetime.fromisoformat(sunrisestr).replace(tzinfo=None).isoformat() if sunrisestr else ""
-			sunsetstr = today["almanac"].get("sunset", "")
-			sunsetstr = datetime.fromisoformat(sunsetstr).replace(tzinfo=None).isoformat() if sunsetstr else ""
-			created = current.get("created")
-			currtime = datetime.fromisoformat(created).replace(tzinfo=None) if created else ""
-			timestr = currtime.strftime("%H:%M h") if currtime else ""
-			tempunit = "°C" if config.plugins.OAWeather.tempUnit.value == "Celsius" else "°F"
-			press = f"{round(current.get('baro', 0))} mbar"
-			temp = f"{round(current.get('temp', 0))} {tempunit}"
-			feels = f"{round(current.get('feels', 0))} {tempunit}"
-			humid = f"{round(current.get('rh', 0))} %"
-			hourly = today["hourly"]
-			precip = f"{round(hourly[0]['precip'])} %" if len(hourly) else self.na  # workaround: use value from next hour if available
-			windSpd = f"{round(current.get('windSpd', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-			windDir = f"{_(weatherhandler.WI.directionsign(round(current.get('windDir', 0))))}"
-			windGusts = f"{round(current.get('windGust', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-			uvIndex = f"{round(current.get('uv', 0))}"
-			visibility = f"{round(current.get('vis', 0))} km"
-			shortDesc = current.get("pvdrCap", "")  # e.g. 'bewölkt'
-			longDesc = current.get("raintext", "")  # e.g. "Der Himmel wird bewölkt."
-			yahoocode = weatherhandler.WI.convert2icon("MSN", current.get("symbol", "")).get("yahooCode")  # e.g. 'n4000' -> {'yahooCode': '26', 'meteoCode': 'Y'}
-			yahoocode = self.nightSwitch(yahoocode, self.getIsNight(currtime, sunrisestr, sunsetstr))
-			iconfile = join(iconpath, f"{yahoocode}.png")
-			iconpix = LoadPixmap(cached=True, path=iconfile) if iconfile and exists(iconfile) else None
-			hourData = []
-			hourData.append([timestr, press, temp, feels, humid, precip, windSpd, windDir, windGusts, uvIndex, visibility, shortDesc, longDesc, iconpix])
-			days = weather["forecast"]["days"]
-			if days:
-				self.sunList = []
-				self.moonList = []
-				for index, day in enumerate(days):  # collect data on future hours of current day
-					if index:
-						hourData = []
-					almanac = day.get("almanac", {})
-					sunrisestr = almanac.get("sunrise", "")
-					sunrisestr = datetime.fromisoformat(sunrisestr).replace(tzinfo=None).isoformat() if sunrisestr else ""
-					sunsetstr = almanac.get("sunset", "")
-					sunsetstr = datetime.fromisoformat(sunsetstr).replace(tzinfo=None).isoformat() if sunsetstr else ""
-					moonrisestr = almanac.get("moonrise", "")
-					moonrisestr = datetime.fromisoformat(moonrisestr).replace(tzinfo=None).isoformat() if moonrisestr else ""
-					moonsetstr = almanac.get("moonset", "")
-					moonsetstr = datetime.fromisoformat(moonsetstr).replace(tzinfo=None).isoformat() if moonsetstr else ""
-					for hour in day.get("hourly", []):
-						valid = hour.get("valid")
-						currtime = datetime.fromisoformat(valid).replace(tzinfo=None) if valid else ""
-						timestr = currtime.strftime("%H:%M h") if currtime else ""
-						press = f"{round(hour.get('baro', 0))} mbar"
-						tempunit = "°C" if config.plugins.OAWeather.tempUnit.value == "Celsius" else "°F"
-						temp = f"{round(hour.get('temp', 0))} {tempunit}"
-						feels = f"{round(hour.get('feels', 0))} {tempunit}"
-						humid = f"{round(hour.get('rh', 0))} %"
-						precip = f"{round(hour.get('precip', 0))} %"
-						windSpd = f"{round(hour.get('windSpd', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-						windDir = f"{_(weatherhandler.WI.directionsign(round(hour.get('windDir', 0))))}"
-						windGusts = f"{round(hour.get('windGust', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-						uvIndex = f"{round(hour.get('uv', 0))}"
-						visibility = f"{round(hour.get('vis', 0))} km"
-						shortDesc = hour.get("pvdrCap", "")  # e.g. 'bewölkt'
-						longDesc = hour.get("summary", "")  # e.g. "Der Himmel wird bewölkt."
-						yahoocode = weatherhandler.WI.convert2icon("MSN", hour.get("symbol", "")).get("yahooCode")  # e.g. 'n4000' -> {'yahooCode': '26', 'meteoCode': 'Y'}
-						yahoocode = self.nightSwitch(yahoocode, self.getIsNight(currtime, sunrisestr, sunsetstr))
-						iconfile = join(iconpath, f"{yahoocode}.png")
-						iconpix = LoadPixmap(cached=True, path=iconfile) if iconfile and exists(iconfile) else None
-						hourData.append([timestr, press, temp, feels, humid, precip, windSpd, windDir, windGusts, uvIndex, visibility, shortDesc, longDesc, iconpix])
-					dayList.append(hourData)
-					self.sunList.append((sunrisestr, sunsetstr))
-					self.moonList.append((moonrisestr, moonsetstr))
-		self.dayList = dayList
-
-	def omwparser(self):
-		iconpath = config.plugins.OAWeather.iconset.value
-		iconpath = join(ICONSETROOT, iconpath) if iconpath else join(PLUGINPATH, "Icons")
-		fulldata = weatherhandler.getFulldata()
-		if fulldata:
-			daily = fulldata.get("daily", {})
-			sunriseList = daily.get("sunrise", [])
-			sunsetList = daily.get("sunset", [])
-			self.sunList = []
-			for index, sunrisestr in enumerate(sunriseList):
-				sunsetstr = sunsetList[index]
-				self.sunList.append((sunrisestr if sunrisestr else self.na, sunsetstr if sunsetstr else self.na))
-			self.moonList = []  # OMW does not support moonrise / moonset at all
-			hourly = fulldata.get("hourly", {})
-			dayList = []
-			if hourly:
-				timeList = hourly.get("time", [])
-				pressList = hourly.get("pressure_msl")
-				tempList = hourly.get("temperature_2m", [])
-				feelsList = hourly.get("apparent_temperature", [])
-				humidList = hourly.get("relativehumidity_2m", [])
-				precipList = hourly.get("precipitation_probability", [])
-				wSpeedList = hourly.get("windspeed_10m", [])
-				wGustList = hourly.get("wind_gusts_10m", [])
-				wDirList = hourly.get("winddirection_10m", [])
-				uvList = hourly.get("uv_index", [])
-				visList = hourly.get("visibility", [])
-				wCodeList = hourly.get("weathercode", [])
-				currday = datetime.fromisoformat(timeList[0]).replace(hour=0, minute=0, second=0, microsecond=0)
-				daycount = 0
-				hourData = []
-				for idx, isotime in enumerate(timeList):
-					currtime = datetime.fromisoformat(isotime)
-					timeday = currtime.replace(hour=0, minute=0, second=0, microsecond=0)
-					if timeday > currday:  # is a new day?
-						currday = timeday
-						daycount += 1
-						dayList.append(hourData)
-						hourData = []
-					timestr = currtime.strftime("%H:%M h")
-					press = f"{round(pressList[idx])} mbar"
-					tempunit = "°C" if config.plugins.OAWeather.tempUnit.value == "Celsius" else "°F"
-					temp = f"{round(tempList[idx])} {tempunit}"
-					feels = f"{round(feelsList[idx])} {tempunit}"
-					humid = f"{round(humidList[idx])} %"
-					precip = f"{round(precipList[idx])} %"
-					windSpd = f"{round(wSpeedList[idx])} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-					windDir = f"{_(weatherhandler.WI.directionsign(round(round(wDirList[idx]))))}"
-					windGusts = f"{round(wGustList[idx])} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-					uvIndex = f"{round(uvList[idx])}"
-					visibility = f"{round(visList[idx] / 1000)} km"
-					shortDesc, longDesc = "", ""  # OMW does not support description texts at all
-					isNight = self.getIsNight(currtime, sunriseList[daycount], sunsetList[daycount])
-					yahoocode = self.nightSwitch(weatherhandler.WI.convert2icon("OMW", wCodeList[idx]).get("yahooCode"), isNight)  # e.g. '1' -> {'yahooCode': '34', 'meteoCode': 'B'}
-					iconfile = join(iconpath, f"{yahoocode}.png")
-					iconpix = LoadPixmap(cached=True, path=iconfile) if iconfile and exists(iconfile) else None
-					hourData.append([timestr, press, temp, feels, humid, precip, windSpd, windDir, windGusts, uvIndex, visibility, shortDesc, longDesc, iconpix])
-			self.dayList = dayList
-
-	def owmparser(self):
-		iconpath = config.plugins.OAWeather.iconset.value
-		iconpath = join(ICONSETROOT, iconpath) if iconpath else join(PLUGINPATH, "Icons")
-		fulldata = weatherhandler.getFulldata()
-		if fulldata:
-			city = fulldata.get("city", {})
-			sunriseTs, sunsetTs = city.get("sunrise", 0), city.get("sunset", 0)  # OM only supports sunris/sunset of today
-			sunrisestr = datetime.fromtimestamp(sunriseTs).isoformat() if sunriseTs else ""
-			sunsetstr = datetime.fromtimestamp(sunsetTs).isoformat() if sunsetTs else ""
-			self.sunList, self.moonList = [], []  # OMW does not support moonrise / moonset at all
-			hourData = []
-			tempunit = "°C" if config.plugins.OAWeather.tempUnit.value == "Celsius" else "°F"
-			timeTs = fulldata.get("dt", 0)  # collect latest available data
-			timestr = datetime.fromtimestamp(timeTs).strftime("%H:%M") if timeTs else ""
-			main = fulldata.get("main", {})
-			hourly = fulldata.get("list", {})
-			press = f"{round(main.get('pressure', 0))} mbar"
-			temp = f"{round(main.get('temp', 0))} {tempunit}"
-			feels = f"{round(main.get('feels_like', 0))} {tempunit}"
-			humid = f"{round(main.get('humidity', 0))} %"
-			precip = f"{round(hourly[0].get('pop', 0) * 100)} %"
-			wind = fulldata.get('wind', {})
-			windSpd = f"{round(wind.get('speed', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-			windDir = f"{_(weatherhandler.WI.directionsign(round(wind.get('deg', 0))))}"
-			windGusts = f"{round(hourly[0].get('wind', {}).get('gust', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-			uvIndex = ""  # OWM does not support UV-index at all
-			visibility = f"{round(fulldata.get('visibility', 0) / 1000)} km"
-			weather = fulldata.get("weather", [""])[0]
-			shortDesc = weather.get("description", "")
-			longDesc = ""  # OWM does not support long descriptions at all
-			currtime = datetime.fromtimestamp(timeTs)
-			isNight = self.getIsNight(currtime, sunrisestr, sunsetstr)
-			yahoocode = self.nightSwitch(weatherhandler.WI.convert2icon("OWM", weather.get("id", "n/a")).get("yahooCode"), isNight)  # e.g. '801' -> {'yahooCode': '34', 'meteoCode': 'B'}
-			iconfile = join(iconpath, f"{yahoocode}.png")
-			iconpix = LoadPixmap(cached=True, path=iconfile) if iconfile and exists(iconfile) else None
-			hourData.append([timestr, press, temp, feels, humid, precip, windSpd, windDir, windGusts, uvIndex, visibility, shortDesc, longDesc, iconpix])
-			dayList = []
-			if hourly:
-				currday = datetime.fromisoformat(hourly[0].get("dt_txt", "1900-01-01 00:00:00")).replace(hour=0, minute=0, second=0, microsecond=0)
-				for hour in hourly:  # collect data on future hours of current day
-					isotime = hour.get("dt_txt", "1900-01-01 00:00:00")
-					currtime = datetime.fromisoformat(isotime)
-					if currtime > datetime.fromtimestamp(timeTs):  # only future values
-						timeday = currtime.replace(hour=0, minute=0, second=0, microsecond=0)
-						if timeday > currday:  # is a new day?
-							currday = timeday
-							dayList.append(hourData)
-							hourData = []
-							self.sunList.append((sunrisestr, sunsetstr))
-						main = hour.get("main", {})
-						timestr = isotime[11:16]
-						press = f"{round(main.get('pressure', 0))} mbar"
-						temp = f"{round(main.get('temp', 0))} {tempunit}"
-						feels = f"{round(main.get('feels_like', 0))} {tempunit}"
-						humid = f"{round(main.get('humidity', 0))} %"
-						precip = f"{round(hour.get('pop', 0) * 100)} %"
-						wind = hour.get("wind", {})
-						windSpd = f"{round(wind.get('speed', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-						windDir = f"{_(weatherhandler.WI.directionsign(round(wind.get('deg', 0))))}"
-						windGusts = f"{round(wind.get('gust', 0))} {'km/h' if config.plugins.OAWeather.windspeedMetricUnit.value == 'km/h' else 'm/s'}"
-						uvIndex = ""  # OWM does not support UV-index at all
-						visibility = f"{round(hour.get('visibility', 0) / 1000)} km"
-						weather = hour.get("weather", [""])[0]
-						shortDesc = weather.get("description", "")
-						longDesc = ""  # OWM does not support long descriptions at all
-						isNight = self.getIsNight(currtime, sunrisestr, sunsetstr)
-						yahoocode = self.nightSwitch(weatherhandler.WI.convert2icon("OWM", weather.get("id", "n/a")).get("yahooCode"), isNight)  # e.g. '801' -> {'yahooCode': '34', 'meteoCode': 'B'}
-						iconfile = join(iconpath, f"{yahoocode}.png")
-						iconpix = LoadPixmap(cached=True, path=iconfile) if iconfile and exists(iconfile) else None
-						hourData.append([timestr, press, temp, feels, humid, precip, windSpd, windDir, windGusts, uvIndex, visibility, shortDesc, longDesc, iconpix])
-			self.dayList = dayList
-
-	def getIsNight(self, currtime, sunrisestr, sunsetstr):
-		if sunrisestr and sunsetstr:
-			sunrise = datetime.fromisoformat(sunrisestr)
-			sunset = datetime.fromisoformat(sunsetstr)
-			isNight = True if currtime < sunrise or currtime > sunset else False
+		return pixmappool.getPixmap(iconindex.getIconFile(join(PLUGINPATH, "Images"), filename))
+
+	def parseData(self):  # rapid calls are coalesced, only the newest one is shown
+		weatherhandler.requestModel("detailview", self.showModel)
+
+	def showModel(self, model):  # the model is normalized once per fetch by the weather handler
+		if model:
+			self.sunList = [(day.sunrise, day.sunset) for day in model.days]
+			self.moonList = [(day.moonrise, day.moonset) for day in model.days] if model.hasMoonData() else []  # calculated if the service does not support them
+			self.dayList = self.createDayList(model) if model.days else []
 		else:
-			isNight = False
-		return isNight
+			self.sunList, self.moonList, self.dayList = [], [], []
+		if self.currdaydelta >= len(self.sunList):  # the new data has fewer days than the day shown, start over with today
+			self.currdaydelta = 0
+			self.currdatehour = datetime.today().replace(minute=0, second=0, microsecond=0)
+		self.updateView()
+
+	def updateView(self):
+		self.updateSkinList()
+		self.updateMoonData()
+
+	def createDayList(self, model):  # one row format for all weather services
+		iconpath = weatherhelper.getIconpath()
+		tempunit = "°C" if config.plugins.OAWeather.tempUnit.value == "Celsius" else "°F"
+		windunit = "km/h" if config.plugins.OAWeather.windspeedMetricUnit.value == "km/h" else "m/s"
+		columns = model.columns
+		timeList = columns["time"]
+
+		def formatRow(day, idx):
+			yahoocode = self.nightSwitch(columns["yahooCode"][idx], columns["isNight"][idx])
+			windDir = columns["windDir"][idx]
+			return [f"{timeList[idx][11:16]} h" if timeList[idx] else "", formatValue(columns["pressure"][idx], "mbar"), formatValue(columns["temp"][idx], tempunit),
+					formatValue(columns["feels"][idx], tempunit), formatValue(columns["humidity"][idx], "%"), formatValue(columns["precip"][idx], "%"),
+					formatValue(columns["windSpeed"][idx], windunit), _(weatherhandler.WI.directionsign(int(windDir))) if isValue(windDir) else "",
+					formatValue(columns["windGusts"][idx], windunit), formatValue(columns["uvIndex"][idx]), formatValue(columns["visibility"][idx], "km"),
+					columns["shortDesc"][idx],  # e.g. 'bewölkt'
+					columns["longDesc"][idx],  # e.g. "Der Himmel wird bewölkt."
+					pixmappool.getIcon(iconpath, yahoocode)]
+
+		return LazyDayList([day.rows for day in model.days], formatRow, lambda day, idx: timeList[idx][11:16])
 
 	def nightSwitch(self, iconcode, isNight):
 		return self.YAHOOnightswitch.get(iconcode, iconcode) if config.plugins.OAWeather.nighticons.value and isNight else self.YAHOOdayswitch.get(iconcode, iconcode)
@@ -875,12 +1291,12 @@ class OAWeatherDetailview(Screen):
 	def favoriteUp(self):
 		if weatherhelper.favoriteList:
 			self.currFavIdx = (self.currFavIdx - 1) % len(weatherhelper.favoriteList)
-			callInThread(weatherhandler.reset, weatherhelper.favoriteList[self.currFavIdx], callback=self.parseData)
+			weatherhandler.switchLocation(weatherhelper.favoriteList[self.currFavIdx], callback=self.parseData)
 
 	def favoriteDown(self):
 		if weatherhelper.favoriteList:
 			self.currFavIdx = (self.currFavIdx + 1) % len(weatherhelper.favoriteList)
-			callInThread(weatherhandler.reset, weatherhelper.favoriteList[self.currFavIdx], callback=self.parseData)
+			weatherhandler.switchLocation(weatherhelper.favoriteList[self.currFavIdx], callback=self.parseData)
 
 	def favoriteChoice(self):
 		choiceList = [(item[0], item) for item in weatherhelper.favoriteList]
@@ -888,33 +1304,42 @@ class OAWeatherDetailview(Screen):
 
 	def returnFavoriteChoice(self, favorite):
 		if favorite is not None:
-			callInThread(weatherhandler.reset, favorite[1], callback=self.parseData)
+			self.currFavIdx = weatherhelper.getFavoriteIndex(favorite[1], self.currFavIdx)
+			weatherhandler.switchLocation(favorite[1], callback=self.parseData)
 
 	def prevEntry(self):
 		self["detailList"].up()
+		self.fillWindow()
 		self.updateDetailFrame()
 
 	def nextEntry(self):
 		self["detailList"].down()
+		self.fillWindow()
 		self.updateDetailFrame()
 
 	def pageDown(self):
 		self["detailList"].pageDown()
+		self.fillWindow()
 		self.updateDetailFrame()
 
 	def pageUp(self):
 		self["detailList"].pageUp()
+		self.fillWindow()
 		self.updateDetailFrame()
 
 	def prevDay(self):
-		self.currdaydelta = (self.currdaydelta - 1) % len(self.dayList)
-		self.currdatehour = datetime.today().replace(minute=0, second=0, microsecond=0) + timedelta(days=self.currdaydelta)
-		callInThread(weatherhandler.reset, callback=self.parseData)
+		self.changeDay(-1)
 
 	def nextDay(self):
-		self.currdaydelta = (self.currdaydelta + 1) % len(self.dayList)
-		self.currdatehour = datetime.today().replace(minute=0, second=0, microsecond=0) + timedelta(days=self.currdaydelta)
-		callInThread(weatherhandler.reset, callback=self.parseData)
+		self.changeDay(1)
+
+	def changeDay(self, step):
+		if self.dayList:
+			self.currdaydelta = (self.currdaydelta + step) % len(self.dayList)
+			self.currdatehour = datetime.today().replace(minute=0, second=0, microsecond=0) + timedelta(days=self.currdaydelta)
+			self.updateView()  # from the data at hand, even if it is outdated
+			if not weatherhandler.isDataFresh():
+				weatherhandler.revalidate(callback=self.parseData)
 
 	def config(self):
 		self.old_weatherservice = config.plugins.OAWeather.weatherservice.value
@@ -927,7 +1352,7 @@ class OAWeatherDetailview(Screen):
 		if self.detailFrameActive:
 			self.detailFrame.showFrame()
 		if self.old_weatherservice != config.plugins.OAWeather.weatherservice.value:
-			callInThread(weatherhandler.reset, callback=self.parseData)
+			weatherhandler.reset(callback=self.parseData)
 		else:
 			self.startRun()
 
@@ -944,7 +1369,7 @@ class OAWeatherFavorites(Screen):
 	def __init__(self, session):
 		self.skin = weatherhelper.loadSkin("OAWeatherFavorites")
 		Screen.__init__(self, session)
-		self.newFavList = weatherhelper.favoriteList[:]
+		self.newFavorites = FavoriteIndex(weatherhelper.favoriteList)
 		self.addFavorite = False
 		self.currindex = 0
 		self.searchcity = ""
@@ -970,7 +1395,7 @@ class OAWeatherFavorites(Screen):
 
 	def updateFavoriteList(self):
 		skinList = []
-		for favorite in self.newFavList:
+		for favorite in self.newFavorites.locations:
 			weathercity, lon, lat = favorite
 			skinList.append((weathercity, f"[lon={lon}, lat={lat}]"))
 		self["favoriteList"].updateList(skinList)
@@ -978,7 +1403,7 @@ class OAWeatherFavorites(Screen):
 	def returnCityname(self, weathercity):
 		if weathercity:
 			self.searchcity = weathercity
-			callInThread(self.citySearch, weathercity)
+			self.citySearch(weathercity)
 
 	def citySearch(self, weathercity):
 		services = {"MSN": "msn", "OpenMeteo": "omw", "OpenWeather": "owm"}
@@ -987,23 +1412,24 @@ class OAWeatherFavorites(Screen):
 		if service == "owm" and len(apikey) < 32:
 			self.session.open(MessageBox, text=_("The API key for OpenWeatherMap is not defined or invalid.\nPlease verify your input data.\nOtherwise your settings won't be saved."), type=MessageBox.TYPE_WARNING)
 		else:
-			WI = Weatherinfo(service, apikey)
-			if WI.error:
-				print("[WeatherSettingsView] Error in module 'citySearch': %s" % WI.error)
-				self.cityChoice((False, _("Error in Weatherinfo"), WI.error))
-			else:
-				geodataList = WI.getCitylist(weathercity, config.osd.language.value.replace('_', '-').lower(), count=15)
-				if WI.error or geodataList is None or len(geodataList) == 0:
-					print("[WeatherSettingsView] Error in module 'citySearch': %s" % WI.error)
-					self.cityChoice((False, _("Error getting City ID"), _("City '%s' not found! Please try another wording.") % weathercity))
-				else:
-					cityList = []
-					for item in geodataList:
-						try:
-							cityList.append((item[0], item[1], item[2]))
-						except Exception:
-							print("[WeatherSettingsView] Error in module 'showMenu': faulty entry in resultlist.")
-					self.cityChoice((True, cityList, ""))
+			dispatcher.submit("citysearch", lambda: self.lookupCity(service, apikey, weathercity), self.cityChoice)
+
+	def lookupCity(self, service, apikey, weathercity):  # runs in a worker thread, returns the answer for cityChoice()
+		WI = newWeatherinfo(service, apikey)
+		if WI.error:
+			print("[WeatherSettingsView] Error in module 'citySearch': %s" % WI.error)
+			return (False, _("Error in Weatherinfo"), WI.error)
+		geodataList = WI.getCitylist(weathercity, config.osd.language.value.replace('_', '-').lower(), count=15)
+		if WI.error or geodataList is None or len(geodataList) == 0:
+			print("[WeatherSettingsView] Error in module 'citySearch': %s" % WI.error)
+			return (False, _("Error getting City ID"), _("City '%s' not found! Please try another wording.") % weathercity)
+		cityList = []
+		for item in geodataList:
+			try:
+				cityList.append((item[0], item[1], item[2]))
+			except Exception:
+				print("[WeatherSettingsView] Error in module 'showMenu': faulty entry in resultlist.")
+		return (True, cityList, "")
 
 	def cityChoice(self, answer):
 		if answer[0] is True:
@@ -1018,28 +1444,16 @@ class OAWeatherFavorites(Screen):
 			weathercity, lon, lat = answer
 			location = (weatherhelper.reduceCityname(weathercity), lon, lat)
 			if self.addFavorite:
-				self.add2FavList(location)
+				self.newFavorites.add(location)
 				self.addFavorite = False
 			else:
-				self.newFavList[self.currindex] = location
+				self.newFavorites.replace(self.currindex, location)
 			self.updateFavoriteList()
 
-	def add2FavList(self, newcomer):
-		append = True
-		newFavList = []
-		for favorite in self.newFavList:
-			if not weatherhelper.isDifferentLocation(newcomer, favorite):  # newcomer contains new coordinates?
-				favorite = favorite if len(favorite[0]) > len(newcomer[0]) else newcomer  # use the one that has more information
-				append = False  # so don't append the newcomer
-			newFavList.append(favorite)
-		if append:
-			newFavList.append(newcomer)
-		self.newFavList = newFavList
-
 	def keyRed(self):
 		current = self["favoriteList"].index
-		if self.newFavList and current is not None:
-			self.currFavorite = self.newFavList[current]
+		if self.newFavorites.locations and current is not None:
+			self.currFavorite = self.newFavorites.locations[current]
 			if weatherhelper.isDifferentLocation(self.currFavorite, config.plugins.OAWeather.weatherlocation.value):
 				msgtxt = _("Do you really want do delete favorite\n'%s'?") % self.currFavorite[0]
 				self.session.openWithCallback(self.returnKeyRed, MessageBox, msgtxt, MessageBox.TYPE_YESNO, timeout=10, default=False)
@@ -1048,21 +1462,19 @@ class OAWeatherFavorites(Screen):
 				self.session.open(MessageBox, msgtxt, MessageBox.TYPE_WARNING, timeout=3)
 
 	def returnKeyRed(self, answer):
-		if answer is True and self.currFavorite in self.newFavList:
-			self.newFavList.remove(self.currFavorite)
+		if answer is True:
+			self.newFavorites.remove(self.currFavorite)
 			self.updateFavoriteList()
 
 	def keyYellow(self):
 		self.currindex = self["favoriteList"].index
-		if self.newFavList and self.currindex is not None:
-			weathercity = weatherhelper.isolateCityname(self.newFavList[self.currindex][0])
+		if self.newFavorites.locations and self.currindex is not None:
+			weathercity = weatherhelper.isolateCityname(self.newFavorites.locations[self.currindex][0])
 			self.session.openWithCallback(self.returnCityname, VirtualKeyBoard, title=_("Weather cityname (at least 3 letters):"), text=weathercity)
 
 	def keyGreen(self):
-		config.plugins.OAWeather.weatherlocation.setChoices([(item, item[0]) for item in self.newFavList])
-		weatherhelper.setFavoriteList(self.newFavList)
-		with open(weatherhelper.favoritefile, "wb") as fd:
-			dump(self.newFavList, fd, protocol=5)  # Force version 5 to be compatible with python < 3.13
+		config.plugins.OAWeather.weatherlocation.setChoices([(item, item[0]) for item in self.newFavorites.locations])
+		weatherhelper.saveFavoriteList(self.newFavorites.locations)
 		self.session.open(MessageBox, _("Favorites have been successfully saved!"), MessageBox.TYPE_INFO, timeout=2)
 
 	def keyBlue(self):
@@ -1071,14 +1483,14 @@ class OAWeatherFavorites(Screen):
 
 	def keyOk(self):
 		current = self["favoriteList"].index
-		returnFavorite = self.newFavList[current] if self.newFavList and current is not None else None
+		returnFavorite = self.newFavorites.locations[current] if self.newFavorites.locations and current is not None else None
 		self.checkChanges(returnFavorite)
 
 	def keyExit(self):
 		self.checkChanges(None)
 
 	def checkChanges(self, returnFavorite):
-		if self.newFavList != weatherhelper.favoriteList:
+		if self.newFavorites.locations != weatherhelper.favoriteList:
 			self.returnFavorite = returnFavorite
 			msgtxt = _("Do you really want do exit without saving your modified favorite list?")
 			self.session.openWithCallback(self.returnCheckChanges, MessageBox, msgtxt, MessageBox.TYPE_YESNO, timeout=10, default=False)
@@ -1091,3 +1503,4 @@ class OAWeatherFavorites(Screen):
 
 
 weatherhandler = WeatherHandler()
+profile("WeatherHandler")
@@ -0,0 +1,60 @@
+# The favorites module has no enigma2 dependencies, so it is imported directly from the plugin folder.
+
+from os.path import dirname, exists, join
+from pickle import dumps
+import sys
+
+sys.path.insert(0, join(dirname(__file__), "..", "src", "Plugins", "Extensions", "OAWeather"))
+
+from favorites import FavoriteFile, FavoriteIndex  # noqa: E402
+
+BERLIN = ("Berlin, DE", 13.4, 52.5)
+PARIS = ("Paris, FR", 2.35, 48.85)
+
+
+def makeFile(tmp_path):
+	return FavoriteFile(str(tmp_path / "oaweather_fav.json"), str(tmp_path / "oaweather_fav.dat"))
+
+
+def test_corrupt_file_is_kept(tmp_path, capsys):
+	favoritefile = makeFile(tmp_path)
+	with open(favoritefile.filename, "w") as fd:
+		fd.write('[["Berlin, DE", 13.4')  # truncated
+	assert favoritefile.read() == (None, False)
+	assert "error in reading favorites file" in capsys.readouterr().out
+	with open(favoritefile.filename) as fd:
+		assert fd.read() == '[["Berlin, DE", 13.4'
+
+
+def test_write_and_read(tmp_path):
+	favoritefile = makeFile(tmp_path)
+	assert favoritefile.read() == (None, True)
+	favoritefile.write([BERLIN, PARIS])
+	assert makeFile(tmp_path).read() == ([BERLIN, PARIS], False)
+	assert not exists(favoritefile.filename + ".tmp")
+
+
+def test_convert_pickle_file(tmp_path):
+	favoritefile = makeFile(tmp_path)
+	with open(favoritefile.picklefile, "wb") as fd:
+		fd.write(dumps([BERLIN, PARIS], protocol=5))
+	assert favoritefile.read() == ([BERLIN, PARIS], True)
+
+
+def test_pickle_file_with_globals_is_refused(tmp_path, capsys):
+	favoritefile = makeFile(tmp_path)
+	with open(favoritefile.picklefile, "wb") as fd:
+		fd.write(b"cos\nsystem\n(S'echo unsafe'\ntR.")
+	assert favoritefile.read() == (None, False)
+	assert "'os.system' is not allowed" in capsys.readouterr().out
+
+
+def test_index_merges_nearby_locations():
+	favorites = FavoriteIndex([BERLIN, PARIS])
+	favorites.add(("Berlin, Mitte, DE", 13.41, 52.51))  # more information: replaces Berlin
+	favorites.add(("Bln", 13.401, 52.5))  # less information: ignored
+	favorites.add(("Rome, IT", 12.5, 41.9))
+	assert favorites.locations == [("Berlin, Mitte, DE", 13.41, 52.51), PARIS, ("Rome, IT", 12.5, 41.9)]
+	favorites.remove(PARIS)
+	assert favorites.indexOf(("Rome, IT", 12.5, 41.9)) == 1
+	assert favorites.indexOf(PARIS, -1) == -1
@@ -0,0 +1,148 @@
+# The normalizer module has no enigma2 dependencies, so it is imported directly from the plugin folder.
+# The payloads are shortened recordings of the services, a few values are set to null or removed on purpose.
+
+from calendar import timegm
+from os.path import dirname, join
+import sys
+
+sys.path.insert(0, join(dirname(__file__), "..", "src", "Plugins", "Extensions", "OAWeather"))
+
+from normalizer import changedSections, fingerprint, isValue, normalize  # noqa: E402
+
+BERLIN = ("Berlin, DE", 13.4, 52.5)
+
+
+def convert2icon(service, code):  # like Weatherinfo.convert2icon(), the code is passed through
+	return {"yahooCode": str(code)}
+
+
+def msnHour(valid, temp, symbol="d000", precip=0):
+	return {"valid": valid, "temp": temp, "feels": temp, "baro": 1016.3, "rh": 60, "precip": precip, "windSpd": 9, "windDir": 250, "windGust": 20, "uv": 3, "vis": 20, "symbol": symbol, "pvdrCap": "Sunny", "summary": "Sunny and pleasant"}
+
+
+MSN = {"responses": [{"weather": [{
+	"current": {"created": "2024-06-01T12:55:00+02:00", "baro": 1015.2, "temp": 21.4, "feels": 22.0, "rh": 55, "windSpd": 11, "windDir": 240, "windGust": 25, "uv": 6, "vis": 20, "symbol": "d100", "pvdrCap": "Mostly sunny", "raintext": "No precipitation"},
+	"forecast": {"days": [
+		{"almanac": {"sunrise": "2024-06-01T04:47:00+02:00", "sunset": "2024-06-01T21:19:00+02:00", "moonrise": "2024-06-01T02:05:00+02:00", "moonset": "2024-06-01T16:12:00+02:00"},
+			"hourly": [msnHour("2024-06-01T14:00:00+02:00", 22.6, precip=10), msnHour("2024-06-01T22:00:00+02:00", 15.1, "n000")]},
+		{"almanac": {"sunrise": "2024-06-02T04:46:00+02:00", "sunset": "2024-06-02T21:20:00+02:00", "moonrise": "2024-06-02T02:23:00+02:00", "moonset": "2024-06-02T17:30:00+02:00"},
+			"hourly": [msnHour("2024-06-02T03:00:00+02:00", 11.5, "n000"), msnHour("2024-06-02T12:00:00+02:00", 24.5)]}
+	]}
+}]}]}
+
+OMWTIMES = ["2024-06-01T00:00", "2024-06-01T12:00", "2024-06-01T23:00", "2024-06-02T00:00", "2024-06-02T12:00", "2024-06-02T23:00"]
+OMW = {
+	"utc_offset_seconds": 7200,
+	"daily": {"time": ["2024-06-01", "2024-06-02"], "sunrise": ["2024-06-01T04:47", "2024-06-02T04:46"], "sunset": ["2024-06-01T21:19", "2024-06-02T21:20"]},
+	"hourly": {
+		"time": OMWTIMES,
+		"temperature_2m": [12.4, 21.5, 14.2, None, 23.1, 15.0],
+		"apparent_temperature": [11.0, 21.9, 13.8, 12.9, 23.4, 14.6],
+		"relativehumidity_2m": [85, 52, 70, 84, 48, 69],
+		"precipitation_probability": [0, 10, 35, 40, 5, 0],
+		"pressure_msl": [1016.1, 1015.4, 1014.8, 1014.5, 1013.9, 1013.2],
+		"windspeed_10m": [6.8, 12.2, 7.9, 7.2, 14.4, 8.3],
+		"winddirection_10m": [225, 251, 240, 232, 260, 247],
+		"wind_gusts_10m": [14.0, 27.4, 16.2, 15.1, "n/a", 17.3],
+		"visibility": [24140, 24140, 24140, 20000, 24140, 24140],
+		"weathercode": [0, 1, 2, 3, 61]  # one value missing
+	}  # no "uv_index"
+}
+
+
+def owmHour(timestamp, temp, pop, weather=True):
+	hour = {"dt": timestamp, "main": {"temp": temp, "feels_like": temp - 0.5, "pressure": 1015, "humidity": 60}, "wind": {"speed": 3.1, "deg": 240, "gust": 6.2}, "visibility": 10000, "pop": pop}
+	if weather:
+		hour["weather"] = [{"id": 800, "description": "clear sky"}]
+	return hour
+
+
+OWMNOW = timegm((2024, 6, 1, 10, 50, 0))  # 12:50 local time
+OWM = {
+	"dt": OWMNOW,
+	"main": {"temp": 21.4, "feels_like": 21.2, "pressure": 1015, "humidity": 55},
+	"wind": {"speed": 3.6, "deg": 240},
+	"visibility": 10000,
+	"weather": [{"id": 801, "description": "few clouds"}],
+	"city": {"name": "Berlin", "timezone": 7200, "sunrise": timegm((2024, 6, 1, 2, 47, 0)), "sunset": timegm((2024, 6, 1, 19, 19, 0))},
+	"list": [
+		owmHour(timegm((2024, 6, 1, 9, 0, 0)), 20.2, 0.1),  # past, only its pop is used for the current row
+		owmHour(timegm((2024, 6, 1, 12, 0, 0)), 22.6, 0.2),
+		owmHour(timegm((2024, 6, 1, 21, 0, 0)), 14.9, None),
+		owmHour(timegm((2024, 6, 2, 0, 0, 0)), 12.1, 0.45, weather=False)
+	]
+}
+
+
+def test_msn():
+	model = normalize("MSN", MSN, convert2icon, BERLIN)
+	assert [day.date for day in model.days] == ["2024-06-01", "2024-06-02"]
+	assert model.columns["time"] == ["2024-06-01T12:55", "2024-06-01T14:00", "2024-06-01T22:00", "2024-06-02T03:00", "2024-06-02T12:00"]
+	assert [list(day.rows) for day in model.days] == [[0, 1, 2], [3, 4]]
+	assert model.columns["temp"] == [21, 23, 15, 12, 24]
+	assert model.columns["precip"][0] == 10  # the current row takes the value of the next hour
+	assert model.columns["yahooCode"][:2] == ["d100", "d000"]
+	assert model.columns["isNight"] == [False, False, True, True, False]
+	assert (model.days[0].sunrise, model.days[0].moonset) == ("2024-06-01T04:47", "2024-06-01T16:12")
+
+
+def test_msn_null_and_missing_fields():
+	current = dict(MSN["responses"][0]["weather"][0]["current"], temp=None, vis="")
+	day = {"almanac": None, "hourly": [dict(msnHour("2024-06-01T14:00:00+02:00", None), baro=None)]}
+	model = normalize("MSN", {"responses": [{"weather": [{"current": current, "forecast": {"days": [day]}}]}]}, convert2icon, BERLIN)
+	assert model.columns["temp"] == [None, None]
+	assert model.columns["visibility"][0] is None
+	assert model.columns["pressure"] == [1015, None]
+	assert model.days[0].sunrise and model.days[0].sunset  # calculated, the service sent no almanac
+	model = normalize("MSN", {"responses": [{"weather": [{"current": current}]}]}, convert2icon, BERLIN)  # no forecast at all
+	assert model.days == [] and model.columns["time"] == []
+
+
+def test_omw():
+	model = normalize("OpenMeteo", OMW, convert2icon, BERLIN)
+	assert [(day.date, list(day.rows)) for day in model.days] == [("2024-06-01", [0, 1, 2]), ("2024-06-02", [3, 4, 5])]
+	assert all(len(model.columns[field]) == len(OMWTIMES) for field in model.columns)
+	assert model.columns["temp"][:3] == [12, 22, 14]
+	assert model.columns["visibility"][0] == 24  # km
+	assert model.columns["isNight"][:3] == [True, False, True]
+	assert model.days[0].sunrise == "2024-06-01T04:47"
+	assert model.hasMoonData()  # calculated, OMW does not send moon times
+
+
+def test_omw_null_and_missing_fields():
+	model = normalize("OpenMeteo", OMW, convert2icon, BERLIN)
+	assert not isValue(model.columns["temp"][3])  # null
+	assert not isValue(model.columns["windGusts"][4])  # text
+	assert not any(isValue(value) for value in model.columns["uvIndex"])  # missing field
+	assert model.columns["yahooCode"][4:] == ["61", "None"]  # missing code, converted like an unknown one
+	assert normalize("OpenMeteo", {"hourly": None, "daily": None}, convert2icon, BERLIN).days == []
+
+
+def test_owm():
+	model = normalize("OpenWeather", OWM, convert2icon, BERLIN)
+	assert model.columns["time"] == ["2024-06-01T12:50", "2024-06-01T14:00", "2024-06-01T23:00", "2024-06-02T02:00"]
+	assert [(day.date, list(day.rows)) for day in model.days] == [("2024-06-01", [0, 1, 2]), ("2024-06-02", [3])]
+	assert model.columns["temp"] == [21, 23, 15, 12]
+	assert model.columns["visibility"][0] == 10
+	assert model.days[0].sunrise == "2024-06-01T04:47"
+	assert model.columns["isNight"] == [False, False, True, True]
+
+
+def test_owm_null_and_missing_fields():
+	model = normalize("OpenWeather", OWM, convert2icon, BERLIN)
+	assert model.columns["precip"] == [10, 20, None, 45]  # null pop
+	assert model.columns["yahooCode"][3] == "n/a"  # no weather entry
+	payload = dict(OWM, city=None, wind=None, weather=[])
+	model = normalize("OpenWeather", payload, convert2icon, BERLIN)
+	assert model.columns["windSpeed"][0] == 0  # missing values default to 0 like before, only null becomes None
+	assert model.columns["yahooCode"][0] == "n/a"
+
+
+def test_fingerprint_detects_changed_sections():
+	data = {"name": "Berlin", "current": {"temp": "21"}, "forecast": {0: {"maxTemp": "24"}, 1: {"maxTemp": "25"}}}
+	model = normalize("MSN", MSN, convert2icon, BERLIN)
+	old = fingerprint(data, model)
+	assert changedSections(old, fingerprint(data, model)) == set()
+	changed = dict(data, forecast={0: {"maxTemp": "24"}, 1: {"maxTemp": "26"}})
+	assert changedSections(old, fingerprint(changed, model)) == {"forecast1"}
+	assert changedSections(old, fingerprint(data)) == {"hourly"}